@@ -9,4 +9,108 @@ DATABASE_URL = os.getenv(
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-SCRAPE_INTERVAL_MINUTES = 2
\ No newline at end of file
+SCRAPE_INTERVAL_MINUTES = 2
+
+# Crawl concurrency: total in-flight fetches, and in-flight fetches per host
+SCRAPE_MAX_CONCURRENCY = int(os.getenv("SCRAPE_MAX_CONCURRENCY", "16"))
+SCRAPE_PER_HOST_CONCURRENCY = int(os.getenv("SCRAPE_PER_HOST_CONCURRENCY", "4"))
+
+# Headless browser pool (Playwright)
+BROWSER_MAX_PAGES = int(os.getenv("BROWSER_MAX_PAGES", "4"))
+BROWSER_RECYCLE_AFTER = int(os.getenv("BROWSER_RECYCLE_AFTER", "50"))
+
+# Local state (caches, crawl schedules) that should survive restarts;
+# point this at a persistent volume in containers (see docker-compose.yml)
+STATE_DIR = os.getenv("STATE_DIR", ".state")
+LISTING_CACHE_PATH = os.getenv(
+    "LISTING_CACHE_PATH", os.path.join(STATE_DIR, "listing_validators.json")
+)
+
+# Shared scraper HTTP client
+SCRAPE_HTTP_TIMEOUT_SECONDS = float(os.getenv("SCRAPE_HTTP_TIMEOUT_SECONDS", "50"))
+SCRAPE_HTTP_RETRY_ATTEMPTS = int(os.getenv("SCRAPE_HTTP_RETRY_ATTEMPTS", "2"))
+SCRAPE_HTTP2 = os.getenv("SCRAPE_HTTP2", "1") == "1"
+
+# CPU-bound HTML parsing / trafilatura extraction
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", str(os.cpu_count() or 1)))
+EXTRACTION_INLINE = os.getenv("EXTRACTION_INLINE", "0") == "1"  # debug: parse on the event loop
+
+# Adaptive per-source crawl intervals (the scheduler tick is the floor)
+CRAWL_MIN_INTERVAL_SECONDS = float(
+    os.getenv("CRAWL_MIN_INTERVAL_SECONDS", str(SCRAPE_INTERVAL_MINUTES * 60))
+)
+CRAWL_MAX_INTERVAL_SECONDS = float(os.getenv("CRAWL_MAX_INTERVAL_SECONDS", "7200"))
+CRAWL_SCHEDULE_PATH = os.getenv(
+    "CRAWL_SCHEDULE_PATH", os.path.join(STATE_DIR, "crawl_schedule.json")
+)
+
+# Topic cluster FAISS index: snapshot + id map + append-only log of additions
+CLUSTER_INDEX_DIR = os.getenv("CLUSTER_INDEX_DIR", os.path.join(STATE_DIR, "cluster_index"))
+CLUSTER_INDEX_SNAPSHOT_EVERY = int(os.getenv("CLUSTER_INDEX_SNAPSHOT_EVERY", "500"))
+
+# Near-duplicate (SimHash) detection before LLM analysis
+DUP_MAX_HAMMING_DISTANCE = int(os.getenv("DUP_MAX_HAMMING_DISTANCE", "4"))
+DUP_WINDOW_DAYS = int(os.getenv("DUP_WINDOW_DAYS", "14"))
+
+# Streaming pipeline: bounded queues between scrape → persist → analyze
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "32"))
+PIPELINE_PERSIST_BATCH_SIZE = int(os.getenv("PIPELINE_PERSIST_BATCH_SIZE", "20"))
+PIPELINE_PERSIST_MAX_WAIT_SECONDS = float(os.getenv("PIPELINE_PERSIST_MAX_WAIT_SECONDS", "2"))
+PIPELINE_ARTICLE_CONCURRENCY = int(os.getenv("PIPELINE_ARTICLE_CONCURRENCY", "4"))  # articles analyzed at once
+X_SEARCH_TIMEOUT_SECONDS = float(os.getenv("X_SEARCH_TIMEOUT_SECONDS", "20"))
+
+# Durable job queue: "inline" analyzes in the scheduler process, "queue"
+# only enqueues pipeline_jobs rows for `python -m tasks.worker` processes
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "inline")
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "600"))
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", str(JOB_LEASE_SECONDS / 3)))  # lease renewal
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "30"))
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "4"))
+WORKER_POLL_SECONDS = float(os.getenv("WORKER_POLL_SECONDS", "5"))
+
+# Regional pipeline: concurrent LLM analysis
+REGION_ANALYSIS_CONCURRENCY = int(os.getenv("REGION_ANALYSIS_CONCURRENCY", "4"))
+REGION_ANALYSIS_TPM = int(os.getenv("REGION_ANALYSIS_TPM", "150000"))
+REGION_ANALYSIS_RETRY_ATTEMPTS = int(os.getenv("REGION_ANALYSIS_RETRY_ATTEMPTS", "3"))
+
+# LLM gateway: parallel requests, per-provider budgets. The provider
+# (AI_MODEL) and API keys are read by ml.providers on first use
+LLM_MAX_PARALLEL = int(os.getenv("LLM_MAX_PARALLEL", "8"))
+LLM_OUTPUT_TOKEN_RESERVE = int(os.getenv("LLM_OUTPUT_TOKEN_RESERVE", "2000"))
+OPENAI_RPM = int(os.getenv("OPENAI_RPM", "500"))
+OPENAI_TPM = int(os.getenv("OPENAI_TPM", "200000"))
+DEEPSEEK_RPM = int(os.getenv("DEEPSEEK_RPM", "300"))
+DEEPSEEK_TPM = int(os.getenv("DEEPSEEK_TPM", "300000"))
+ANTHROPIC_RPM = int(os.getenv("ANTHROPIC_RPM", "50"))
+ANTHROPIC_TPM = int(os.getenv("ANTHROPIC_TPM", "50000"))
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "60"))
+DEEPSEEK_TIMEOUT_SECONDS = float(os.getenv("DEEPSEEK_TIMEOUT_SECONDS", "120"))
+ANTHROPIC_TIMEOUT_SECONDS = float(os.getenv("ANTHROPIC_TIMEOUT_SECONDS", "60"))
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+DEEPSEEK_MAX_CONNECTIONS = int(os.getenv("DEEPSEEK_MAX_CONNECTIONS", "20"))
+ANTHROPIC_MAX_CONNECTIONS = int(os.getenv("ANTHROPIC_MAX_CONNECTIONS", "10"))
+
+# LLM routing: "single" uses AI_MODEL only; "hedged" sends a second request
+# to the backup provider (LLM_BACKUP_PROVIDER, see ml.providers) once the
+# primary exceeds its p95 latency
+LLM_ROUTING = os.getenv("LLM_ROUTING", "single")
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+LLM_HEDGE_MIN_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_MIN_DELAY_SECONDS", "2"))
+LLM_HEDGE_DEFAULT_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY_SECONDS", "20"))
+LLM_BREAKER_WINDOW = int(os.getenv("LLM_BREAKER_WINDOW", "50"))
+LLM_BREAKER_MIN_CALLS = int(os.getenv("LLM_BREAKER_MIN_CALLS", "10"))
+LLM_BREAKER_ERROR_RATE = float(os.getenv("LLM_BREAKER_ERROR_RATE", "0.5"))
+LLM_BREAKER_COOLDOWN_SECONDS = float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", "60"))
+
+# Article-text token budgets per prompt (input is cut at sentence boundaries)
+ANALYZE_ARTICLE_INPUT_TOKENS = int(os.getenv("ANALYZE_ARTICLE_INPUT_TOKENS", "3000"))
+ANALYZE_NO_CLAIM_INPUT_TOKENS = int(os.getenv("ANALYZE_NO_CLAIM_INPUT_TOKENS", "3000"))
+ANALYZE_REGIONAL_INPUT_TOKENS = int(os.getenv("ANALYZE_REGIONAL_INPUT_TOKENS", "3000"))
+UHALISI_POSTS_INPUT_TOKENS = int(os.getenv("UHALISI_POSTS_INPUT_TOKENS", "2500"))
+
+# On-disk cache of LLM responses, keyed by provider/model/prompt/input
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(STATE_DIR, "llm_cache.sqlite3"))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000"))
@@ -0,0 +1,33 @@
+import asyncio
+import threading
+
+_loops: dict[str, asyncio.AbstractEventLoop] = {}
+_loops_lock = threading.Lock()
+
+
+def get_loop(name: str) -> asyncio.AbstractEventLoop:
+    """
+    Return a named event loop that runs forever on its own daemon thread.
+    Objects bound to a loop (browsers, HTTP clients, locks) can then be
+    reused across scheduler runs instead of dying with asyncio.run().
+    """
+    with _loops_lock:
+        loop = _loops.get(name)
+        if loop is None or loop.is_closed():
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=loop.run_forever,
+                name=f"{name}-loop",
+                daemon=True,
+            )
+            thread.start()
+            _loops[name] = loop
+        return loop
+
+
+def run_on_loop(name: str, coro):
+    """
+    Run a coroutine on the named long-lived loop and block until it is done.
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, get_loop(name))
+    return future.result()
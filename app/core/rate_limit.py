@@ -0,0 +1,34 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Per-minute budget that refills continuously. `acquire(n)` waits until
+    n units are available, so callers spread out instead of bursting into
+    a 429 at the start of every minute.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self._rate = self.capacity / 60.0
+        self._available = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._available = min(
+            self.capacity, self._available + (now - self._updated) * self._rate
+        )
+        self._updated = now
+
+    async def acquire(self, amount: float = 1) -> None:
+        # A single request larger than the whole budget still has to run
+        amount = min(float(amount), self.capacity)
+        async with self._lock:
+            self._refill()
+            while self._available < amount:
+                await asyncio.sleep((amount - self._available) / self._rate)
+                self._refill()
+            self._available -= amount
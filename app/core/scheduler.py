@@ -33,6 +33,8 @@ def start_scheduler():
 
     log.info("scheduler_started")
 
+    # The jobs tick every SCRAPE_INTERVAL_MINUTES; each tick only crawls the
+    # sources whose adaptive interval has elapsed (ingestion/crawl_schedule.py)
     scheduler.add_job(
         run_pipeline,
         "interval",
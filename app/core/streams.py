@@ -0,0 +1,53 @@
+import asyncio
+from typing import AsyncIterable, AsyncIterator, TypeVar
+
+T = TypeVar("T")
+
+
+async def abatch(
+    source: AsyncIterable[T],
+    size: int,
+    max_wait: float,
+) -> AsyncIterator[list[T]]:
+    """
+    Group an async stream into lists of up to `size` items. A partial
+    batch is released once its first item has waited `max_wait` seconds,
+    so a slow producer never holds finished items back for long.
+    """
+    iterator = source.__aiter__()
+    loop = asyncio.get_running_loop()
+    batch: list[T] = []
+    deadline = 0.0
+    pending: asyncio.Future | None = None
+
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+
+            timeout = max(0.0, deadline - loop.time()) if batch else None
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+
+            if pending not in done:
+                yield batch
+                batch = []
+                continue
+
+            try:
+                item = pending.result()
+            except StopAsyncIteration:
+                pending = None
+                if batch:
+                    yield batch
+                return
+            pending = None
+
+            if not batch:
+                deadline = loop.time() + max_wait
+            batch.append(item)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
@@ -0,0 +1,26 @@
+from typing import Iterable, Iterator
+
+# get_all accepts many refs per call; keep requests reasonably small
+GET_ALL_CHUNK_SIZE = 100
+
+
+def _chunks(items: list, size: int) -> Iterator[list]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def get_existing(client, refs: Iterable) -> dict[str, dict]:
+    """
+    Fetch many documents with one get_all round trip per chunk.
+    Returns {doc_id: data} for the documents that exist.
+    """
+    unique = list({ref.id: ref for ref in refs}.values())
+    existing: dict[str, dict] = {}
+
+    for chunk in _chunks(unique, GET_ALL_CHUNK_SIZE):
+        for snap in client.get_all(chunk):
+            if snap.exists:
+                existing[snap.id] = snap.to_dict()
+
+    return existing
+
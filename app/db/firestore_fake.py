@@ -0,0 +1,196 @@
+"""
+In-memory stand-in for the Firestore client.
+
+Implements the small subset of the API the ingestion code uses
+(collection/document refs, get/set, get_all, batch, bulk_writer) and
+counts round trips, with an optional simulated per-call latency, so
+batching changes can be measured offline:
+
+    python -m db.firestore_fake --docs 400 --latency 0.03
+"""
+import copy
+import threading
+import time
+from collections import defaultdict
+
+
+class FakeSnapshot:
+    def __init__(self, reference, data: dict | None):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> dict | None:
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+
+class FakeDocumentReference:
+    def __init__(self, client, collection: str, doc_id: str):
+        self._client = client
+        self.collection_name = collection
+        self.id = doc_id
+
+    @property
+    def path(self) -> str:
+        return f"{self.collection_name}/{self.id}"
+
+    def get(self) -> FakeSnapshot:
+        self._client._round_trip("get")
+        return self._client._snapshot(self)
+
+    def set(self, data: dict, merge: bool = False) -> None:
+        self._client._round_trip("set")
+        self._client._write(self, data, merge)
+
+
+class FakeCollectionReference:
+    def __init__(self, client, name: str):
+        self._client = client
+        self.id = name
+
+    def document(self, doc_id: str) -> FakeDocumentReference:
+        return FakeDocumentReference(self._client, self.id, doc_id)
+
+    def stream(self):
+        self._client._round_trip("stream")
+        for doc_id in list(self._client._store[self.id]):
+            yield self._client._snapshot(self.document(doc_id))
+
+
+class FakeWriteBatch:
+    def __init__(self, client):
+        self._client = client
+        self._ops: list[tuple] = []
+
+    def set(self, reference, data: dict, merge: bool = False) -> None:
+        self._ops.append((reference, data, merge))
+
+    def __len__(self) -> int:
+        return len(self._ops)
+
+    def commit(self) -> None:
+        self._client._round_trip("commit")
+        for ref, data, merge in self._ops:
+            self._client._write(ref, data, merge)
+        self._ops = []
+
+
+class FakeBulkWriter:
+    """Buffers sets and flushes them in groups, like BulkWriter."""
+
+    def __init__(self, client, batch_size: int = 20):
+        self._client = client
+        self._batch_size = batch_size
+        self._pending = FakeWriteBatch(client)
+
+    def set(self, reference, data: dict, merge: bool = False) -> None:
+        self._pending.set(reference, data, merge)
+        if len(self._pending) >= self._batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if len(self._pending):
+            self._pending.commit()
+
+    def close(self) -> None:
+        self.flush()
+
+
+class FakeFirestoreClient:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls: dict[str, int] = defaultdict(int)
+        self._store: dict[str, dict[str, dict]] = defaultdict(dict)
+        self._lock = threading.Lock()
+
+    @property
+    def round_trips(self) -> int:
+        return sum(self.calls.values())
+
+    def collection(self, name: str) -> FakeCollectionReference:
+        return FakeCollectionReference(self, name)
+
+    def get_all(self, references):
+        refs = list(references)
+        self._round_trip("get_all")
+        for ref in refs:
+            yield self._snapshot(ref)
+
+    def batch(self) -> FakeWriteBatch:
+        return FakeWriteBatch(self)
+
+    def bulk_writer(self) -> FakeBulkWriter:
+        return FakeBulkWriter(self)
+
+    def reset_counters(self) -> None:
+        self.calls.clear()
+
+    def _round_trip(self, kind: str) -> None:
+        with self._lock:
+            self.calls[kind] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _snapshot(self, ref) -> FakeSnapshot:
+        with self._lock:
+            data = self._store[ref.collection_name].get(ref.id)
+        return FakeSnapshot(ref, copy.deepcopy(data))
+
+    def _write(self, ref, data: dict, merge: bool) -> None:
+        with self._lock:
+            docs = self._store[ref.collection_name]
+            if merge and ref.id in docs:
+                docs[ref.id].update(copy.deepcopy(data))
+            else:
+                docs[ref.id] = copy.deepcopy(data)
+
+
+def _benchmark(n_docs: int, latency: float, existing_ratio: float) -> None:
+    from db.firestore_batch import get_existing
+
+    def seeded_client():
+        client = FakeFirestoreClient(latency=latency)
+        col = client.collection("bench")
+        for i in range(int(n_docs * existing_ratio)):
+            client._write(col.document(f"doc-{i}"), {"n": i}, merge=False)
+        return client, col
+
+    # Serial: one get() and one set() per document
+    client, col = seeded_client()
+    start = time.perf_counter()
+    for i in range(n_docs):
+        ref = col.document(f"doc-{i}")
+        if not ref.get().exists:
+            ref.set({"n": i}, merge=True)
+    serial = (time.perf_counter() - start, client.round_trips)
+
+    # Batched, as in save_region_articles: chunked get_all, then a BulkWriter
+    client, col = seeded_client()
+    start = time.perf_counter()
+    refs = [col.document(f"doc-{i}") for i in range(n_docs)]
+    existing = get_existing(client, refs)
+    writer = client.bulk_writer()
+    for i, ref in enumerate(refs):
+        if ref.id not in existing:
+            writer.set(ref, {"n": i}, merge=True)
+    writer.close()
+    batched = (time.perf_counter() - start, client.round_trips)
+
+    print(f"docs={n_docs} latency={latency * 1000:.0f}ms existing={existing_ratio:.0%}")
+    print(f"serial : {serial[1]:5d} round trips  {serial[0]:7.2f}s")
+    print(f"batched: {batched[1]:5d} round trips  {batched[0]:7.2f}s")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark Firestore batching offline")
+    parser.add_argument("--docs", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=0.03)
+    parser.add_argument("--existing", type=float, default=0.5)
+    args = parser.parse_args()
+    _benchmark(args.docs, args.latency, args.existing)
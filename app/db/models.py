@@ -40,6 +40,16 @@ class TruthCluster(Base):
     final_truth_summary = Column(Text)
     confidence_score = Column(Float)
 
+class ClusterEmbedding(Base):
+    """
+    Normalized float32 embedding that represents a topic cluster in the
+    FAISS index, kept so the index can be rebuilt without re-embedding.
+    """
+    __tablename__ = "cluster_embeddings"
+    cluster_id = Column(Integer, ForeignKey("truth_clusters.id"), primary_key=True)
+    embedding = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
 class ClaimSupport(Base):
     __tablename__ = "claim_support"
     id = Column(Integer, primary_key=True)
@@ -47,6 +57,64 @@ class ClaimSupport(Base):
     claim_id = Column(Integer)
     support_type = Column(Enum("supporting","contradicting", name="support_type_enum"))
     
+class ContentSignature(Base):
+    """
+    SimHash of an article's text, used to spot the same story published
+    under different URLs. canonical_url points at the first copy seen.
+    """
+    __tablename__ = "content_signatures"
+    id = Column(Integer, primary_key=True)
+    namespace = Column(Text, nullable=False)  # "articles" | "regional"
+    url = Column(Text, nullable=False)
+    simhash = Column(BigInteger, nullable=False)
+    canonical_url = Column(Text, nullable=False)
+    created_at = Column(DateTime, server_default=func.now(), index=True)
+    __table_args__ = (UniqueConstraint("namespace", "url"),)
+
+PIPELINE_STAGES = ("scraped", "analyzed", "twitter_done", "published")
+
+
+class PipelineJob(Base):
+    """
+    One unit of pipeline work: bring `article_id` to `stage`. Workers
+    claim pending rows with FOR UPDATE SKIP LOCKED and hold a lease while
+    they run; an expired lease makes the row claimable again.
+    """
+    __tablename__ = "pipeline_jobs"
+    id = Column(Integer, primary_key=True)
+    article_id = Column(Integer, ForeignKey("articles.id"), nullable=False, index=True)
+    stage = Column(Enum(*PIPELINE_STAGES, name="pipeline_stage_enum"), nullable=False)
+    status = Column(
+        Enum("pending", "running", "done", "failed", name="pipeline_job_status_enum"),
+        nullable=False,
+        default="pending",
+    )
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    available_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    lease_expires_at = Column(DateTime(timezone=True))
+    locked_by = Column(Text)
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    __table_args__ = (
+        UniqueConstraint("article_id", "stage"),
+        Index("ix_pipeline_jobs_claim", "status", "available_at"),
+    )
+
+class ArticleCheckpoint(Base):
+    """
+    A finished step of process_article and its output, so a retry or a
+    restart resumes from the first unfinished step instead of repeating
+    X searches and LLM calls.
+    """
+    __tablename__ = "article_checkpoints"
+    id = Column(Integer, primary_key=True)
+    article_id = Column(Integer, ForeignKey("articles.id"), nullable=False, index=True)
+    stage = Column(Text, nullable=False)  # "twitter_search" | "twitter_done" | "analysis"
+    result = Column(JSON)
+    completed_at = Column(DateTime(timezone=True), server_default=func.now())
+    __table_args__ = (UniqueConstraint("article_id", "stage"),)
+
 class UnionFind:
     def __init__(self):
         self.parent = {}
@@ -0,0 +1,147 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from playwright.async_api import async_playwright
+
+from core.config import BROWSER_MAX_PAGES, BROWSER_RECYCLE_AFTER
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/122.0.0.0 Safari/537.36"
+)
+
+# Shared resource-blocking policy: heavy resources we never need for scraping
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+
+
+async def block_heavy_resources(route):
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+class _ContextSlot:
+    def __init__(self, context):
+        self.context = context
+        self.navigations = 0
+        self.open_pages = 0
+        self.retired = False
+
+
+class BrowserPool:
+    """
+    One long-lived Chromium per event loop. Pages are handed out from a
+    shared browser context; the context is replaced after `recycle_after`
+    pages so cookies, caches and leaked memory don't pile up.
+    """
+
+    def __init__(
+        self,
+        max_pages: int = BROWSER_MAX_PAGES,
+        recycle_after: int = BROWSER_RECYCLE_AFTER,
+    ):
+        self._recycle_after = recycle_after
+        self._pages = asyncio.Semaphore(max_pages)
+        self._lock = asyncio.Lock()
+        self._playwright = None
+        self._browser = None
+        self._slot: _ContextSlot | None = None
+
+    async def _ensure_browser(self):
+        if self._browser is not None and self._browser.is_connected():
+            return
+
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+
+        logger.info("Launching pooled Chromium")
+        self._browser = await self._playwright.chromium.launch(
+            headless=True,
+            args=[
+                "--no-sandbox",
+                "--disable-dev-shm-usage",
+            ],
+        )
+        self._slot = None
+
+    async def _acquire_slot(self) -> _ContextSlot:
+        async with self._lock:
+            await self._ensure_browser()
+
+            if self._slot is None or self._slot.navigations >= self._recycle_after:
+                old = self._slot
+                self._slot = _ContextSlot(
+                    await self._browser.new_context(user_agent=USER_AGENT)
+                )
+                if old is not None:
+                    old.retired = True
+                    if old.open_pages == 0:
+                        await self._close_context(old)
+
+            slot = self._slot
+            slot.navigations += 1
+            slot.open_pages += 1
+            return slot
+
+    async def _release_slot(self, slot: _ContextSlot):
+        async with self._lock:
+            slot.open_pages -= 1
+            if slot.retired and slot.open_pages == 0:
+                await self._close_context(slot)
+
+    async def _close_context(self, slot: _ContextSlot):
+        try:
+            await slot.context.close()
+        except Exception as e:
+            logger.warning("Closing browser context failed: %s", str(e))
+
+    @asynccontextmanager
+    async def page(self, block_resources: bool = True):
+        async with self._pages:
+            slot = await self._acquire_slot()
+            page = None
+            try:
+                page = await slot.context.new_page()
+                if block_resources:
+                    await page.route("**/*", block_heavy_resources)
+                yield page
+            finally:
+                if page is not None:
+                    try:
+                        await page.close()
+                    except Exception:
+                        pass
+                await self._release_slot(slot)
+
+    async def close(self):
+        async with self._lock:
+            if self._browser is not None:
+                await self._browser.close()
+                self._browser = None
+                self._slot = None
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+
+_pools: dict[asyncio.AbstractEventLoop, BrowserPool] = {}
+
+
+def get_browser_pool() -> BrowserPool:
+    """
+    Playwright objects are bound to the loop that created them, so keep
+    one pool per running loop.
+    """
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        for stale in [l for l in _pools if l.is_closed()]:
+            del _pools[stale]
+        pool = BrowserPool()
+        _pools[loop] = pool
+    return pool
@@ -0,0 +1,140 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+from core.config import (
+    CRAWL_MAX_INTERVAL_SECONDS,
+    CRAWL_MIN_INTERVAL_SECONDS,
+    CRAWL_SCHEDULE_PATH,
+)
+
+logger = logging.getLogger(__name__)
+
+# Scheduler ticks drift by a few seconds; don't push a due source to the next tick
+DUE_SLACK_SECONDS = 15
+# How many discovered URLs per source we remember to tell "new" from "seen"
+MAX_REMEMBERED_URLS = 500
+
+
+def _url_key(url: str) -> str:
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+
+
+class CrawlSchedule:
+    """
+    Per-source crawl interval that adapts to how often a source yields
+    URLs it hasn't shown before.
+
+    A crawl that finds new URLs halves the interval (down to the floor);
+    a quiet crawl doubles it (up to the ceiling). State is persisted so a
+    restart doesn't reset every source back to the floor.
+    """
+
+    def __init__(
+        self,
+        path: str = CRAWL_SCHEDULE_PATH,
+        min_interval: float = CRAWL_MIN_INTERVAL_SECONDS,
+        max_interval: float = CRAWL_MAX_INTERVAL_SECONDS,
+    ):
+        self.path = Path(path)
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self._state: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                self._state = json.load(f)
+        except FileNotFoundError:
+            self._state = {}
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable crawl schedule %s: %s", self.path, str(e))
+            self._state = {}
+
+    def is_due(self, key: str, now: float | None = None) -> bool:
+        entry = self._state.get(key)
+        if entry is None:
+            return True
+        now = time.time() if now is None else now
+        return now >= entry.get("next_due", 0) - DUE_SLACK_SECONDS
+
+    def record(
+        self,
+        key: str,
+        discovered_urls: list[str] | None,
+        now: float | None = None,
+    ) -> float:
+        """
+        Record one crawl of `key`. `discovered_urls` is None when the
+        listing was unchanged. Returns the new interval in seconds.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._state.setdefault(key, {
+                "interval": self.min_interval,
+                "seen": [],
+            })
+
+            new_count = 0
+            if discovered_urls is not None:
+                seen = set(entry.get("seen", []))
+                current = [_url_key(u) for u in discovered_urls]
+                new_count = sum(1 for k in current if k not in seen)
+                entry["seen"] = current[:MAX_REMEMBERED_URLS]
+
+            interval = entry.get("interval", self.min_interval)
+            if new_count > 0:
+                interval = max(self.min_interval, interval / 2)
+            else:
+                interval = min(self.max_interval, interval * 2)
+
+            entry["interval"] = interval
+            entry["last_new_count"] = new_count
+            entry["last_crawled"] = now
+            entry["next_due"] = now + interval
+            self._dirty = True
+            return interval
+
+    def record_failure(self, key: str, now: float | None = None) -> None:
+        """
+        A failed crawl says nothing about the change rate: retry at the
+        current interval.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._state.setdefault(key, {
+                "interval": self.min_interval,
+                "seen": [],
+            })
+            entry["next_due"] = now + entry.get("interval", self.min_interval)
+            self._dirty = True
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(self._state, f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+
+_crawl_schedule: CrawlSchedule | None = None
+_crawl_schedule_lock = threading.Lock()
+
+
+def get_crawl_schedule() -> CrawlSchedule:
+    global _crawl_schedule
+    with _crawl_schedule_lock:
+        if _crawl_schedule is None:
+            _crawl_schedule = CrawlSchedule()
+        return _crawl_schedule
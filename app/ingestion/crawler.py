@@ -0,0 +1,37 @@
+import asyncio
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+
+from core.config import SCRAPE_MAX_CONCURRENCY, SCRAPE_PER_HOST_CONCURRENCY
+
+
+class CrawlLimiter:
+    """
+    Concurrency gate for one crawl run.
+
+    Every fetch takes a slot for its host first and then a global slot,
+    so a slow host can only tie up its own share of the crawl.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = SCRAPE_MAX_CONCURRENCY,
+        per_host: int = SCRAPE_PER_HOST_CONCURRENCY,
+    ):
+        self._global = asyncio.Semaphore(max_concurrency)
+        self._per_host = per_host
+        self._hosts: dict[str, asyncio.Semaphore] = {}
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        sem = self._hosts.get(host)
+        if sem is None:
+            sem = asyncio.Semaphore(self._per_host)
+            self._hosts[host] = sem
+        return sem
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        async with self._host_semaphore(url):
+            async with self._global:
+                yield
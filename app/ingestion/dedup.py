@@ -0,0 +1,258 @@
+import hashlib
+import logging
+import re
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+
+from core.config import DUP_MAX_HAMMING_DISTANCE, DUP_WINDOW_DAYS
+from db.models import ContentSignature
+from db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+SHINGLE_SIZE = 5
+_BIT_SHIFTS = np.arange(64, dtype=np.uint64)
+_NON_WORD = re.compile(r"\W+")
+
+
+def simhash(text: str) -> int:
+    """
+    64-bit SimHash over character shingles. Character shingles work the
+    same for English and for Japanese text without word boundaries.
+    """
+    norm = _NON_WORD.sub("", text.lower())
+    if len(norm) <= SHINGLE_SIZE:
+        shingles = {norm}
+    else:
+        shingles = {
+            norm[i:i + SHINGLE_SIZE]
+            for i in range(len(norm) - SHINGLE_SIZE + 1)
+        }
+
+    digests = b"".join(
+        hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest()
+        for s in shingles
+    )
+    hashes = np.frombuffer(digests, dtype=">u8").astype(np.uint64)
+    bits = (hashes[:, None] >> _BIT_SHIFTS) & np.uint64(1)
+    votes = bits.sum(axis=0) * 2 > len(hashes)
+
+    value = 0
+    for i in np.flatnonzero(votes):
+        value |= 1 << int(i)
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def _to_signed(value: int) -> int:
+    # Postgres BIGINT is signed
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _to_unsigned(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+class NearDuplicateIndex:
+    """
+    SimHash signatures for one namespace, with LSH banding for lookup.
+
+    The 64-bit hash is split into max_distance + 1 bands. Two hashes within
+    max_distance bits of each other must agree on at least one band, so
+    only hashes sharing a band need an exact distance check.
+
+    Signatures older than DUP_WINDOW_DAYS are pruned as new ones arrive,
+    so the index of a long-running process stays bounded.
+    """
+
+    def __init__(self, namespace: str, max_distance: int = DUP_MAX_HAMMING_DISTANCE):
+        self.namespace = namespace
+        self.max_distance = max_distance
+        self._band_count = max_distance + 1
+        self._band_bits = 64 // self._band_count
+        self._band_mask = (1 << self._band_bits) - 1
+        # Entry ids only grow, so every band lists its ids oldest first
+        self._bands: dict[tuple[int, int], deque[int]] = {}
+        self._entries: dict[int, tuple[int, str, str, datetime]] = {}  # (simhash, url, canonical_url, created_at)
+        self._urls: set[str] = set()
+        self._next_id = 0
+        self._oldest_id = 0
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def _band_keys(self, value: int):
+        for band in range(self._band_count):
+            yield band, (value >> (band * self._band_bits)) & self._band_mask
+
+    def _add_memory(self, url: str, value: int, canonical_url: str, created_at: datetime):
+        idx = self._next_id
+        self._next_id += 1
+        self._entries[idx] = (value, url, canonical_url, created_at)
+        self._urls.add(url)
+        for key in self._band_keys(value):
+            self._bands.setdefault(key, deque()).append(idx)
+
+    def _prune(self, cutoff: datetime) -> int:
+        """Forget signatures that fell out of the DUP_WINDOW_DAYS window."""
+        pruned = 0
+        while self._oldest_id < self._next_id:
+            value, url, _, created_at = self._entries[self._oldest_id]
+            if created_at is not None and created_at >= cutoff:
+                break
+            del self._entries[self._oldest_id]
+            self._urls.discard(url)
+            for key in self._band_keys(value):
+                band = self._bands[key]
+                band.popleft()  # the oldest id in each of its bands
+                if not band:
+                    del self._bands[key]
+            self._oldest_id += 1
+            pruned += 1
+        if pruned:
+            logger.info("Pruned %d expired %s signatures", pruned, self.namespace)
+        return pruned
+
+    def _delete_expired(self, cutoff: datetime):
+        db = SessionLocal()
+        try:
+            deleted = db.execute(
+                delete(ContentSignature)
+                .where(ContentSignature.namespace == self.namespace)
+                .where(ContentSignature.created_at < cutoff)
+            ).rowcount
+            db.commit()
+        finally:
+            db.close()
+        logger.info("Deleted %d expired %s signature rows", deleted, self.namespace)
+
+    def load(self):
+        since = datetime.utcnow() - timedelta(days=DUP_WINDOW_DAYS)
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                select(
+                    ContentSignature.url,
+                    ContentSignature.simhash,
+                    ContentSignature.canonical_url,
+                    ContentSignature.created_at,
+                )
+                .where(ContentSignature.namespace == self.namespace)
+                .where(ContentSignature.created_at >= since)
+                .order_by(ContentSignature.id)
+            ).all()
+        finally:
+            db.close()
+
+        with self._lock:
+            for url, value, canonical_url, created_at in rows:
+                self._add_memory(url, _to_unsigned(value), canonical_url, created_at)
+            self._loaded = True
+        logger.info("Loaded %d %s signatures", len(rows), self.namespace)
+        self._delete_expired(since)
+
+    def find(self, value: int) -> str | None:
+        """
+        Canonical URL of the closest stored near-duplicate, if any.
+        """
+        best = None
+        for key in self._band_keys(value):
+            for idx in self._bands.get(key, ()):
+                other, _, canonical_url, _ = self._entries[idx]
+                distance = hamming_distance(value, other)
+                if distance <= self.max_distance and (best is None or distance < best[0]):
+                    best = (distance, canonical_url)
+        return best[1] if best else None
+
+    def mark(self, articles: list[dict]) -> list[dict]:
+        """
+        Sign each article and set article["canonical_url"] on the ones
+        that duplicate an earlier story (from this batch or a previous
+        cycle). New signatures are persisted, so pass only articles that
+        are (or will be) stored: a signature becomes a canonical URL that
+        later copies link to.
+        """
+        if not self._loaded:
+            self.load()
+
+        new_rows = []
+        now = datetime.utcnow()
+        cutoff = now - timedelta(days=DUP_WINDOW_DAYS)
+        with self._lock:
+            pruned = self._prune(cutoff)
+            for a in articles:
+                url = a["url"]
+                if url in self._urls or not a.get("content"):
+                    continue
+
+                value = simhash(a["content"])
+                canonical_url = self.find(value)
+                if canonical_url and canonical_url != url:
+                    a["canonical_url"] = canonical_url
+                else:
+                    canonical_url = url
+
+                self._add_memory(url, value, canonical_url, now)
+                new_rows.append({
+                    "namespace": self.namespace,
+                    "url": url,
+                    "simhash": _to_signed(value),
+                    "canonical_url": canonical_url,
+                })
+
+        if new_rows:
+            db = SessionLocal()
+            try:
+                db.execute(
+                    insert(ContentSignature)
+                    .values(new_rows)
+                    .on_conflict_do_nothing(index_elements=["namespace", "url"])
+                )
+                db.commit()
+            finally:
+                db.close()
+
+        if pruned:
+            # Rows age out of the table together with the in-memory entries
+            self._delete_expired(cutoff)
+
+        duplicates = sum(1 for a in articles if a.get("canonical_url"))
+        logger.info("Near-duplicates in batch (%s): %d", self.namespace, duplicates)
+        return articles
+
+
+def get_canonical_url(namespace: str, url: str) -> str | None:
+    """
+    Canonical URL recorded for `url`, or None if it is itself canonical
+    (or was never signed).
+    """
+    db = SessionLocal()
+    try:
+        canonical_url = db.execute(
+            select(ContentSignature.canonical_url)
+            .where(ContentSignature.namespace == namespace)
+            .where(ContentSignature.url == url)
+        ).scalar_one_or_none()
+    finally:
+        db.close()
+    return canonical_url if canonical_url and canonical_url != url else None
+
+
+_indexes: dict[str, NearDuplicateIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_near_duplicate_index(namespace: str) -> NearDuplicateIndex:
+    with _indexes_lock:
+        index = _indexes.get(namespace)
+        if index is None:
+            index = NearDuplicateIndex(namespace)
+            _indexes[namespace] = index
+        return index
@@ -0,0 +1,581 @@
+import asyncio
+import logging
+import multiprocessing
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from io import BytesIO
+from urllib.parse import urljoin, urlparse, parse_qs, unquote
+
+from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
+from lxml.etree import ParserError
+from dateutil import parser as date_parser
+import trafilatura
+
+from core.config import EXTRACTION_INLINE, EXTRACTION_WORKERS
+from ingestion.sources import CompiledSource, compile_url_patterns
+
+# Everything in this module runs inside extraction worker processes, so it
+# must stay free of DB / browser / app imports and only deal in plain data.
+
+logger = logging.getLogger(__name__)
+
+MIN_CONTENT_LENGTH = 200
+MAX_ARTICLE_AGE_DAYS = 10
+JST = timezone(timedelta(hours=9))
+XML_DECLARATION = re.compile(r"^[\s\ufeff]*<\?xml[^>]*\?>")
+
+
+# -------------------------
+# Executor
+# -------------------------
+_executor: ProcessPoolExecutor | None = None
+# The pipeline and region loops run on different threads
+_executor_lock = threading.Lock()
+
+
+def get_extraction_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # The parent runs the scheduler, event-loop threads and Playwright;
+                # forking it could hand a worker a lock some other thread holds
+                _executor = ProcessPoolExecutor(
+                    max_workers=max(1, EXTRACTION_WORKERS),
+                    mp_context=multiprocessing.get_context("forkserver"),
+                )
+    return _executor
+
+
+async def run_extraction(fn, *args):
+    """
+    Run a CPU-bound parsing function off the event loop.
+    Set EXTRACTION_INLINE=1 to run it in-process for debugging.
+    """
+    if EXTRACTION_INLINE:
+        return fn(*args)
+
+    global _executor
+    loop = asyncio.get_running_loop()
+    executor = get_extraction_executor()
+    try:
+        return await loop.run_in_executor(executor, fn, *args)
+    except BrokenProcessPool:
+        # A worker died (OOM, segfault in lxml...): start a fresh pool next time
+        with _executor_lock:
+            if _executor is executor:
+                _executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+
+
+# -------------------------
+# Parsing
+# -------------------------
+def discover_article_urls(
+    html: str,
+    base_url: str,
+    patterns: list[str] | re.Pattern | None,
+) -> list[str]:
+    """
+    Collect same-domain links whose path matches the source's patterns.
+    `patterns` is ideally the source's precompiled url_matcher; a raw
+    pattern list is compiled on the fly.
+    """
+    if not isinstance(patterns, re.Pattern):
+        patterns = compile_url_patterns(patterns)
+    if patterns is None or not html:
+        return []
+
+    # lxml rejects already-decoded text that still carries an XML
+    # encoding declaration (XHTML pages)
+    html = XML_DECLARATION.sub("", html, count=1)
+    try:
+        doc = lxml.html.fromstring(html)
+    except (ParserError, ValueError) as e:
+        logger.warning("Could not parse listing %s: %s", base_url, str(e))
+        return []
+
+    domain = urlparse(base_url).netloc
+    matcher = patterns.search
+    urls: set[str] = set()
+
+    for href in doc.xpath("//a/@href"):
+        href = href.split("#")[0]
+        url = urljoin(base_url, href)
+        parsed = urlparse(url)
+        if parsed.netloc != domain:
+            continue
+
+        if matcher(parsed.path):
+            urls.add(url)
+
+    logger.info("Discovered %d article URLs from %s", len(urls), base_url)
+    return list(urls)
+
+
+def normalize_date(raw_date: str | None) -> datetime | None:
+    if not raw_date:
+        return None
+
+    raw = raw_date.lower().strip()
+    now = datetime.now(JST).replace(microsecond=0)
+
+    # Relative time
+    match = re.search(
+        r"(\d+)\s*(second|sec|minute|min|hour|day|week|month|year)s?\s*ago",
+        raw
+    )
+
+    if match:
+        value = int(match.group(1))
+        unit = match.group(2)
+
+        if unit.startswith(("sec", "second")):
+            return now - timedelta(seconds=value)
+        if unit.startswith(("min", "minute")):
+            return now - timedelta(minutes=value)
+        if unit.startswith("hour"):
+            return now - timedelta(hours=value)
+        if unit.startswith("day"):
+            return now - timedelta(days=value)
+        if unit.startswith("week"):
+            return now - timedelta(weeks=value)
+        if unit.startswith("month"):
+            return now - timedelta(days=value * 30)
+        if unit.startswith("year"):
+            return now - timedelta(days=value * 365)
+
+    # Absolute date
+    try:
+        # IMPORTANT: inject time if missing
+        dt = date_parser.parse(raw, fuzzy=True, default=now)
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=JST)
+        else:
+            dt = dt.astimezone(JST)
+            
+        return dt.replace(microsecond=0)
+    except Exception:
+        return None
+    
+def unwrap_next_image(url: str) -> str:
+    if "_next/image" not in url:
+        return url
+
+    parsed = urlparse(url)
+    params = parse_qs(parsed.query)
+
+    real = params.get("url")
+    if real:
+        return unquote(real[0])
+
+    return url
+
+def normalize_image_url(url: str, base_url: str) -> str:
+    url = url.strip()
+
+    # 1️⃣ Handle protocol-relative URLs
+    if url.startswith("//"):
+        url = "https:" + url
+    elif url.startswith("/"):
+        url = urljoin(base_url, url)
+
+    # 2️⃣ Unwrap Next.js / Nuxt / Vercel images
+    parsed = urlparse(url)
+    if "/_next/image" in parsed.path:
+        qs = parse_qs(parsed.query)
+        if "url" in qs:
+            url = unquote(qs["url"][0])
+
+    # 3️⃣ CoinTelegraph CDN unwrap (optional)
+    if "images.cointelegraph.com" in url and "https://" in url:
+        url = url[url.rfind("https://"):]
+
+    # --- unwrap Decrypt proxy ---
+    if "img.decrypt.co" in url and "/plain/" in url:
+        url = url.split("/plain/", 1)[1]
+        url = unquote(url)
+
+    # remove @webp
+    if "@webp" in url:
+        url = url.split("@webp", 1)[0]
+    return url
+
+def parse_srcset(srcset: str) -> list[str]:
+    items = []
+    for part in srcset.split(","):
+        parts = part.strip().split()
+        if len(parts) == 2 and parts[1].endswith("w"):
+            try:
+                width = int(parts[1][:-1])
+                items.append((width, parts[0]))
+            except ValueError:
+                continue
+    # largest width first
+    items.sort(reverse=True)
+    return [url for _, url in items]
+
+def is_valid_image_url(
+    url: str,
+    allowed_extensions: list[str] | None,
+) -> bool:
+    parsed = urlparse(url)
+    path = parsed.path.lower()
+
+    # If extensions are configured → enforce them
+    if allowed_extensions:
+        for ext in allowed_extensions:
+            if path.endswith("." + ext):
+                return True
+
+        # No extension → ACCEPT (important)
+        if "." not in path.rsplit("/", 1)[-1]:
+            return True
+
+        # Has extension but not allowed → reject
+        return False
+
+    # No extension rules → accept everything
+    return True
+
+def extract_image_from_imgs(
+    html: str,
+    base_url: str,
+    image_patterns: list[str],
+    parent_classes: list[str] | None = None,
+    image_extensions: list[str] | None = None,
+) -> str | None:
+    
+    soup = BeautifulSoup(html, "lxml")
+    parents = []
+
+    # Collect parent elements
+    if parent_classes:
+        for cls in parent_classes:
+            found = soup.select(f".{cls}")
+            if found:
+                parents.extend(found)
+
+    # Fallback to entire document
+    if not parents:
+        parents = [soup]
+
+    candidate_images = []
+
+    for parent in parents:
+        for img in parent.find_all("img"):
+            src = (
+                img.get("data-src")
+                or img.get("data-lazy-src")
+                or img.get("data-original")
+                or img.get("src")
+                or img.get("srcset")
+            )
+            if not src:
+                continue
+            print("original src===>", src)
+            src = normalize_image_url(src, base_url)
+            
+            print("normalized src===>", src)
+
+            if not is_valid_image_url(
+                src,
+                image_extensions,
+            ):
+                continue
+
+            # Skip SVGs or logos
+            if src.lower().endswith(".svg") or "/themes/decrypt-media/" in src:
+                continue
+
+            # Must match image_patterns
+            if image_patterns and not any(p in src for p in image_patterns):
+                continue
+
+            # Try to get image width/height from attributes
+            width = img.get("width")
+            height = img.get("height")
+            size = 0
+            try:
+                size = int(width) * int(height)
+            except (TypeError, ValueError):
+                # fallback to 0 if not available
+                size = 0
+
+            # Check srcset for higher resolution
+            srcset = img.get("srcset")
+            if srcset:
+                # Pick the largest width in srcset
+                matches = re.findall(r"(\S+)\s+(\d+)x", srcset)
+                for m_url, m_w in matches:
+                    try:
+                        m_w = int(m_w)
+                        if m_w > size:
+                            candidate_images.append((m_w, normalize_image_url(m_url, base_url)))
+                    except:
+                        continue
+
+            candidate_images.append((size, src))
+
+    # Return the image with the largest size
+    if candidate_images:
+        # sort by size descending
+        candidate_images.sort(key=lambda x: x[0], reverse=True)
+        return candidate_images[0][1]
+
+    return None
+
+
+def extract_main_html(html: str) -> str | None:
+    soup = BeautifulSoup(html, "lxml")
+    main_tag = soup.find("main")
+    return str(main_tag) if main_tag else None
+
+
+def select_article_image(
+    html: str,
+    url: str,
+    metadata,
+    source: CompiledSource | None,
+) -> str | None:
+    """
+    Prefer the page's og:image (already parsed into trafilatura metadata),
+    falling back to scanning <img> tags with the source's image rules.
+    """
+    image_patterns = source.image_patterns if source else ()
+    image_extensions = source.image_extensions if source else ()
+    parent_classes = source.image_parent_classes if source else ()
+
+    og_image = getattr(metadata, "image", None) if metadata else None
+    if og_image:
+        candidate = normalize_image_url(og_image, url)
+        if (
+            is_valid_image_url(candidate, image_extensions)
+            and not candidate.lower().endswith(".svg")
+            and (not image_patterns or any(p in candidate for p in image_patterns))
+        ):
+            return candidate
+
+    return extract_image_from_imgs(
+        html=html,
+        base_url=url,
+        image_patterns=image_patterns,
+        parent_classes=parent_classes,
+        image_extensions=image_extensions,
+    )
+
+
+def is_recent(publish_date, days: int = 2) -> bool:
+    if not publish_date:
+        return None
+    
+    if publish_date.tzinfo is None:
+        publish_date = publish_date.replace(tzinfo=timezone.utc)
+    
+    now = datetime.now(timezone.utc)
+    return publish_date >= (now-timedelta(days=days))
+
+
+def parse_article_html(
+    html: str,
+    url: str,
+    source: CompiledSource | None = None,
+    feed_entry: dict | None = None,
+) -> dict | None:
+    """
+    Turn one downloaded article page into a compact article dict:
+    text, metadata and lead image all come from the same HTML.
+
+    When the URL came from a feed, the feed's title, publish date and
+    image win over what the page metadata says.
+    """
+    feed_entry = feed_entry or {}
+    text_html = html
+    if "coindesk.com" in url:
+        main_html = extract_main_html(html)
+        if not main_html:
+            return None
+        text_html = f"<html><body>{main_html}</body></html>"
+
+    metadata = trafilatura.metadata.extract_metadata(html)
+    text = trafilatura.extract(
+        text_html,
+        include_comments=False,
+        include_tables=False
+    )
+
+    if not text or len(text.strip()) < MIN_CONTENT_LENGTH:
+        return None
+
+    publish_date = normalize_date(
+        feed_entry.get("publish_date") or (metadata.date if metadata else None)
+    )
+    
+    if not is_recent(publish_date, days=MAX_ARTICLE_AGE_DAYS):
+       return None 
+
+    return {
+        "title": feed_entry.get("title") or (metadata.title if metadata else None),
+        "content": text.strip(),
+        "publish_date": publish_date.isoformat() if publish_date else None,
+        "url": metadata.url if metadata and metadata.url else url,
+        "image_url": (
+            feed_entry.get("image_url")
+            or select_article_image(html, url, metadata, source)
+        ),
+    }
+
+
+# -------------------------
+# RSS / Atom / news sitemaps
+# -------------------------
+FEED_DATE_TAGS = ("publication_date", "pubDate", "published", "updated", "date", "lastmod")
+
+
+def _local(tag) -> str | None:
+    if not isinstance(tag, str):
+        return None
+    return etree.QName(tag).localname
+
+
+def _text(elem) -> str | None:
+    if elem is None or elem.text is None:
+        return None
+    text = elem.text.strip()
+    return text or None
+
+
+def parse_feed_date(raw_date: str | None) -> datetime | None:
+    """
+    Feed dates carry their own zone (RFC 822 in RSS, ISO 8601 in Atom and
+    sitemaps), so parse the raw string first. Free-form text falls back
+    to normalize_date.
+    """
+    if not raw_date:
+        return None
+    raw = raw_date.strip()
+    try:
+        dt = parsedate_to_datetime(raw)
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)  # "-0000": UTC, origin unknown
+    except (TypeError, ValueError):
+        try:
+            dt = date_parser.isoparse(raw)
+        except (ValueError, OverflowError):
+            return normalize_date(raw)
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=JST)
+    return dt.astimezone(JST).replace(microsecond=0)
+
+
+def _parse_feed_item(item, base_url: str) -> dict:
+    """
+    Pull url / title / date / image out of one <item>, <entry> or
+    sitemap <url>, whichever vocabulary the feed uses.
+    """
+    link = None
+    title = None
+    dates: dict[str, str] = {}
+    image = None
+
+    for el in item.iter():
+        name = _local(el.tag)
+        if name is None or el is item:
+            continue
+
+        if name == "link" and link is None:
+            # RSS: <link>url</link>, Atom: <link rel="alternate" href="url"/>
+            if el.get("href"):
+                if el.get("rel", "alternate") == "alternate":
+                    link = el.get("href")
+            else:
+                link = _text(el)
+        elif name == "loc" and link is None and _local(el.getparent().tag) == "url":
+            link = _text(el)
+        elif name == "title" and title is None:
+            title = _text(el)
+        elif name in FEED_DATE_TAGS and name not in dates:
+            value = _text(el)
+            if value:
+                dates[name] = value
+        elif image is None:
+            if name in ("content", "thumbnail") and el.get("url"):
+                medium = el.get("medium") or el.get("type") or "image"
+                if medium.startswith("image"):
+                    image = el.get("url")
+            elif name == "enclosure" and el.get("url"):
+                if (el.get("type") or "").startswith("image"):
+                    image = el.get("url")
+            elif name == "loc" and _local(el.getparent().tag) == "image":
+                image = _text(el)
+
+    raw_date = next((dates[t] for t in FEED_DATE_TAGS if t in dates), None)
+    return {
+        "url": urljoin(base_url, link) if link else None,
+        "title": title,
+        "publish_date": raw_date,
+        "image_url": normalize_image_url(image, base_url) if image else None,
+    }
+
+
+def parse_feed(
+    data: bytes,
+    base_url: str,
+    url_matcher: re.Pattern | None = None,
+    max_age_days: int = MAX_ARTICLE_AGE_DAYS,
+) -> list[dict]:
+    """
+    Stream-parse an RSS, Atom or (news) sitemap document.
+    Entries older than `max_age_days` are dropped here, before any page
+    fetch; entries without a date are kept and judged on the page.
+    """
+    entries: list[dict] = []
+    seen: set[str] = set()
+
+    context = etree.iterparse(
+        BytesIO(data),
+        events=("end",),
+        recover=True,
+        huge_tree=True,
+        resolve_entities=False,
+        no_network=True,
+    )
+    for _, elem in context:
+        name = _local(elem.tag)
+        if name not in ("item", "entry", "url"):
+            continue
+        parent = elem.getparent()
+        if name == "url" and (parent is None or _local(parent.tag) != "urlset"):
+            continue  # e.g. RSS <image><url>
+
+        entry = _parse_feed_item(elem, base_url)
+
+        # Keep memory flat on big sitemaps
+        elem.clear()
+        if parent is not None:
+            while elem.getprevious() is not None:
+                del parent[0]
+
+        url = entry["url"]
+        if not url or url in seen:
+            continue
+        if url_matcher is not None and not url_matcher.search(urlparse(url).path):
+            continue
+
+        published = parse_feed_date(entry["publish_date"])
+        if published is not None and not is_recent(published, days=max_age_days):
+            continue
+        entry["publish_date"] = published.isoformat() if published else None
+
+        seen.add(url)
+        entries.append(entry)
+
+    logger.info("Parsed %d recent feed entries from %s", len(entries), base_url)
+    return entries
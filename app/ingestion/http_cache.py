@@ -0,0 +1,113 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Iterable
+
+from core.config import LISTING_CACHE_PATH
+
+logger = logging.getLogger(__name__)
+
+
+def body_hash(body: str | bytes) -> str:
+    if isinstance(body, str):
+        body = body.encode("utf-8", "replace")
+    return hashlib.sha256(body).hexdigest()
+
+
+class ListingValidatorCache:
+    """
+    Persistent HTTP validators for source listing pages.
+
+    Per URL we keep the ETag, Last-Modified and a hash of the last body,
+    so a listing page can be revalidated with a conditional GET and an
+    unchanged page can be skipped even when the server ignores validators.
+
+    Validators from a fresh fetch are only staged. They take effect once
+    commit() is called for the URL, after the listing's articles have been
+    stored; until then the next crawl still sees the page as changed.
+    """
+
+    def __init__(self, path: str = LISTING_CACHE_PATH):
+        self.path = Path(path)
+        self._entries: dict[str, dict] = {}
+        self._staged: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                self._entries = json.load(f)
+        except FileNotFoundError:
+            self._entries = {}
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable listing cache %s: %s", self.path, str(e))
+            self._entries = {}
+
+    def request_headers(self, url: str) -> dict[str, str]:
+        entry = self._entries.get(url) or {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store_validators(self, url: str, response_headers) -> None:
+        with self._lock:
+            staged = self._staged.setdefault(url, {})
+            staged["etag"] = response_headers.get("etag")
+            staged["last_modified"] = response_headers.get("last-modified")
+
+    def has_changed(self, url: str, body: str | bytes) -> bool:
+        """
+        Stage the body hash for `url` and report whether it differs
+        from the committed one.
+        """
+        digest = body_hash(body)
+        with self._lock:
+            if self._entries.get(url, {}).get("body_hash") == digest:
+                return False
+            self._staged.setdefault(url, {})["body_hash"] = digest
+            return True
+
+    def commit(self, urls: Iterable[str]) -> None:
+        """Apply the validators staged for `urls`."""
+        with self._lock:
+            for url in urls:
+                staged = self._staged.pop(url, None)
+                if staged:
+                    self._entries.setdefault(url, {}).update(staged)
+                    self._dirty = True
+
+    def discard(self, url: str) -> None:
+        """Drop staged validators, so the next crawl fetches `url` in full."""
+        with self._lock:
+            self._staged.pop(url, None)
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+
+_listing_cache: ListingValidatorCache | None = None
+_listing_cache_lock = threading.Lock()
+
+
+def get_listing_cache() -> ListingValidatorCache:
+    global _listing_cache
+    with _listing_cache_lock:
+        if _listing_cache is None:
+            _listing_cache = ListingValidatorCache()
+        return _listing_cache
@@ -0,0 +1,108 @@
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+import httpx
+from tenacity import (
+    retry,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential,
+)
+
+from core.config import (
+    SCRAPE_HTTP2,
+    SCRAPE_HTTP_RETRY_ATTEMPTS,
+    SCRAPE_HTTP_TIMEOUT_SECONDS,
+    SCRAPE_MAX_CONCURRENCY,
+)
+
+HTTP_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/122.0.0.0 Safari/537.36"
+    ),
+    "Accept": (
+        "text/html,application/xhtml+xml,"
+        "application/xml;q=0.9,image/webp,*/*;q=0.8"
+    ),
+    "Accept-Language": "en-US,en;q=0.9",
+    "Connection": "keep-alive",
+    "Referer": "https://www.google.com/",
+}
+# HTTP_HEADERS = {
+#     "User-Agent": "Mozilla/5.0 (compatible; NewsCrawler/1.0)"
+# }
+
+_client_var: ContextVar[httpx.AsyncClient | None] = ContextVar(
+    "scraper_http_client", default=None
+)
+
+
+def create_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        headers=HTTP_HEADERS,
+        follow_redirects=True,
+        http2=SCRAPE_HTTP2,
+        timeout=httpx.Timeout(SCRAPE_HTTP_TIMEOUT_SECONDS, connect=10.0),
+        limits=httpx.Limits(
+            max_connections=SCRAPE_MAX_CONCURRENCY * 2,
+            max_keepalive_connections=SCRAPE_MAX_CONCURRENCY,
+            keepalive_expiry=30.0,
+        ),
+    )
+
+
+@asynccontextmanager
+async def crawl_http_client():
+    """
+    Open one pooled client for a crawl run. Every fetch made inside the
+    block (including from tasks it spawns) reuses its keep-alive
+    connections.
+    """
+    client = create_http_client()
+    token = _client_var.set(client)
+    try:
+        yield client
+    finally:
+        _client_var.reset(token)
+        await client.aclose()
+
+
+@asynccontextmanager
+async def _borrow_client():
+    client = _client_var.get()
+    if client is not None:
+        yield client
+        return
+
+    # Called outside a crawl run (e.g. one-off scripts): use a throwaway client
+    async with create_http_client() as client:
+        yield client
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, httpx.TransportError):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status == 429 or status >= 500
+    return False
+
+
+@retry(
+    stop=stop_after_attempt(SCRAPE_HTTP_RETRY_ATTEMPTS),
+    wait=wait_exponential(min=1, max=8),
+    retry=retry_if_exception(_is_retryable),
+    reraise=True,
+)
+async def fetch(url: str, headers: dict[str, str] | None = None) -> httpx.Response:
+    """
+    GET through the shared client with the scraper's retry policy.
+    Raises for error statuses; 304 Not Modified is returned as-is.
+    """
+    async with _borrow_client() as client:
+        response = await client.get(url, headers=headers)
+    if response.status_code != 304:
+        response.raise_for_status()
+    return response
@@ -1,101 +1,220 @@
+import asyncio
+import logging
 from datetime import datetime
-from sqlalchemy.exc import IntegrityError
 from db.session import SessionLocal
 from db.models import Article
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 from api.routes.articles import generate_slug
 from db.firebase import db
+from db.firestore_batch import get_existing
 from firebase_admin import firestore
-from ml.claim_extraction import analyze_article1
+from ml.claim_extraction import analyze_article1_async
+from ingestion.url_index import get_known_url_index
+from ingestion.dedup import get_near_duplicate_index
+from ingestion.http_cache import get_listing_cache
+from tenacity import retry, stop_after_attempt, wait_exponential
+from core.config import (
+    REGION_ANALYSIS_CONCURRENCY,
+    REGION_ANALYSIS_RETRY_ATTEMPTS,
+    REGION_ANALYSIS_TPM,
+)
+from core.rate_limit import TokenBucket
+from ml.tokens import count_tokens
+
+logger = logging.getLogger(__name__)
+
+SAVE_CHUNK_SIZE = 500
+# analyze_article1's prompt plus room for the rewritten article
+ANALYSIS_TOKEN_OVERHEAD = 2500
+
+_analysis_semaphore: asyncio.Semaphore | None = None
+_analysis_budget: TokenBucket | None = None
+
+
+def is_storable(a: dict) -> bool:
+    """Only articles with a lead image are stored."""
+    return bool(a.get("image_url"))
+
 
 def save_articles(articles: list[dict]) -> list[int]:
-    db = SessionLocal()
-    saved_ids: list[int] = []
+    """
+    Insert new articles with one INSERT ... ON CONFLICT (url) DO NOTHING
+    RETURNING id per chunk. Existing URLs are skipped by Postgres and
+    only the ids of newly inserted rows come back.
+    """
+    known_urls = get_known_url_index()
+    rows: list[dict] = []
+    seen_urls: set[str] = set()
 
-    try:
-        for a in articles:
-            if a["image_url"]:
-                article = Article(
-                    title=a["title"],
-                    content=a["content"],
-                    url=a["url"],
-                    publish_date=datetime.fromisoformat(a["publish_date"])
-                    if a.get("publish_date") else None,
-                    source=a["name"],
-                    country=a["country"],
-                    credibility_score=a["credibility_score"],
-                    image_url = a["image_url"],
-                    slug = generate_slug(a["url"], a["title"])
-                )
-
-                db.add(article)
-            else:
-                continue
-            try:
-                db.commit()
-                db.refresh(article)
-                saved_ids.append(article.id)
-            except IntegrityError:
-                db.rollback()
-                # already exists, skip
-                                # 🔑 fetch existing article
-                # existing = db.execute(
-                #     select(Article).where(Article.url == a["url"])
-                # ).scalar_one_or_none()
-
-                # if existing:
-                #     saved_ids.append(existing.id)
+    for a in articles:
+        if not is_storable(a) or a["url"] in seen_urls:
+            continue
+        seen_urls.add(a["url"])
+        rows.append({
+            "title": a["title"],
+            "content": a["content"],
+            "url": a["url"],
+            "publish_date": datetime.fromisoformat(a["publish_date"])
+            if a.get("publish_date") else None,
+            "source": a["name"],
+            "country": a["country"],
+            "credibility_score": a["credibility_score"],
+            "image_url": a["image_url"],
+            "slug": generate_slug(a["url"], a["title"]),
+        })
 
+    saved_ids: list[int] = []
+    if not rows:
+        return saved_ids
 
+    db = SessionLocal()
+    try:
+        for start in range(0, len(rows), SAVE_CHUNK_SIZE):
+            chunk = rows[start:start + SAVE_CHUNK_SIZE]
+            stmt = (
+                insert(Article)
+                .values(chunk)
+                .on_conflict_do_nothing(index_elements=["url"])
+                .returning(Article.id)
+            )
+            saved_ids.extend(db.execute(stmt).scalars().all())
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
     finally:
         db.close()
 
+    # inserted or already present: either way these URLs are known now
+    for a in articles:
+        if is_storable(a):
+            known_urls.add(a["url"], a.get("discovered_url"))
+            known_urls.add_image(a["image_url"])
+
     return saved_ids
 
 
 
-def save_region_articles(articles: list[dict]) -> list[int]:
-    saved_ids: list[int] = []
-    collection_ref = db.collection("stablescoin_regional")
-    
-    
+def regional_slug(a: dict) -> str:
+    slug = generate_slug(a["url"], a["title"])
+    if slug.lower().endswith(".html"):
+        slug = slug[:-5]
+    return slug
+
+
+def _analysis_limits() -> tuple[asyncio.Semaphore, TokenBucket]:
+    global _analysis_semaphore, _analysis_budget
+    if _analysis_semaphore is None:
+        _analysis_semaphore = asyncio.Semaphore(REGION_ANALYSIS_CONCURRENCY)
+        _analysis_budget = TokenBucket(REGION_ANALYSIS_TPM)
+    return _analysis_semaphore, _analysis_budget
+
+
+@retry(
+    stop=stop_after_attempt(REGION_ANALYSIS_RETRY_ATTEMPTS),
+    wait=wait_exponential(multiplier=1, min=2, max=30),
+    reraise=True,
+)
+async def analyze_regional(title: str, content: str) -> dict:
+    """analyze_article1 under the regional concurrency limit and TPM budget."""
+    semaphore, budget = _analysis_limits()
+    async with semaphore:
+        await budget.acquire(count_tokens(title + content) + ANALYSIS_TOKEN_OVERHEAD)
+        return await analyze_article1_async(title, content)
+
+
+async def save_region_articles(articles: list[dict], client=None) -> list[str]:
+    """
+    Analyze and store regional articles in Firestore. Existence checks go
+    through chunked get_all calls. New articles are analyzed concurrently
+    and each one is queued on a BulkWriter as soon as its analysis
+    returns; a failed article is logged and skipped without affecting
+    the others. Its listing's staged validators are discarded, so the
+    next crawl fetches that listing again and retries the article.
+    """
+    client = client or db
+    collection_ref = client.collection("stablescoin_regional")
+
+    # Same wire story on several prefecture pages → analyze it once
+    articles = [a for a in articles if is_storable(a)]
+    articles = await asyncio.to_thread(get_near_duplicate_index("regional").mark, articles)
+
+    candidates: dict[str, dict] = {}
     for a in articles:
-        if not a.get("image_url"):
-            continue
+        candidates.setdefault(regional_slug(a), a)
 
-        slug = generate_slug(a["url"], a["title"])
-        if slug.lower().endswith(".html"):
-            slug = slug[:-5]
-        doc_ref = collection_ref.document(slug)
-        doc = doc_ref.get()
+    canonical_slugs = {
+        slug: regional_slug({"url": a["canonical_url"], "title": a["title"]})
+        for slug, a in candidates.items()
+        if a.get("canonical_url")
+    }
 
-        # 🚀 Skip if already exists
-        if doc.exists:
-            continue
-        analyze = analyze_article1(a["title"], a["content"])
-        publish_date = (
-            datetime.fromisoformat(a["publish_date"])
-            if a.get("publish_date")
-            else None
-        )
-        article_data = {
-            # "title": a["title"],
-            # "content": a["content"],
-            "url": a["url"],
-            "publish_date": publish_date,
-            "source": a["name"],
-            "region": a["country"].lower(),
-            "image_url": a["image_url"],
-            "slug": slug,
-            "title": analyze["new_title"],
-            "content": analyze["new_content"],
-            "created_at": firestore.SERVER_TIMESTAMP,
-        }
+    refs = {slug: collection_ref.document(slug) for slug in candidates}
+    canonical_refs = [
+        collection_ref.document(slug)
+        for slug in set(canonical_slugs.values()) - refs.keys()
+    ]
+    existing = await asyncio.to_thread(
+        get_existing, client, [*refs.values(), *canonical_refs]
+    )
+
+    # 🚀 Skip if already exists
+    loop = asyncio.get_running_loop()
+    results = {
+        slug: loop.create_future() for slug in candidates if slug not in existing
+    }
+    writer = client.bulk_writer()
 
-        # slug as document ID → prevents duplicates
-        doc_ref = collection_ref.document(slug)
-        doc_ref.set(article_data, merge=True)
+    async def process(slug: str, a: dict) -> None:
+        try:
+            canonical = None
+            canonical_slug = canonical_slugs.get(slug)
+            if canonical_slug and canonical_slug != slug:
+                if canonical_slug in results:
+                    canonical = await results[canonical_slug]
+                else:
+                    canonical = existing.get(canonical_slug)
 
-        saved_ids.append(slug)
+            if canonical:
+                analyze = {
+                    "new_title": canonical["title"],
+                    "new_content": canonical["content"],
+                }
+            else:
+                analyze = await analyze_regional(a["title"], a["content"])
+            publish_date = (
+                datetime.fromisoformat(a["publish_date"])
+                if a.get("publish_date")
+                else None
+            )
+            article_data = {
+                "url": a["url"],
+                "publish_date": publish_date,
+                "source": a["name"],
+                "region": a["country"].lower(),
+                "image_url": a["image_url"],
+                "slug": slug,
+                "title": analyze["new_title"],
+                "content": analyze["new_content"],
+                "created_at": firestore.SERVER_TIMESTAMP,
+            }
+            if canonical:
+                article_data["canonical_slug"] = canonical["slug"]
+
+            # slug as document ID → prevents duplicates
+            writer.set(refs[slug], article_data, merge=True)
+            results[slug].set_result(article_data)
+        except Exception:
+            logger.exception("Regional article failed: %s", a["url"])
+            if a.get("listing_url"):
+                get_listing_cache().discard(a["listing_url"])
+            # Duplicates waiting on this article fall back to their own analysis
+            results[slug].set_result(None)
+
+    try:
+        await asyncio.gather(*(process(slug, candidates[slug]) for slug in results))
+    finally:
+        await asyncio.to_thread(writer.close)
 
-    return saved_ids
\ No newline at end of file
+    return [slug for slug, result in results.items() if result.result() is not None]
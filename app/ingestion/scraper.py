@@ -1,428 +1,108 @@
-import httpx
+import asyncio
 import logging
-import re
-from datetime import datetime, timedelta, timezone
-from urllib.parse import urljoin, urlparse, parse_qs, unquote
+from typing import AsyncIterator
+from urllib.parse import urljoin
 
-from bs4 import BeautifulSoup
 from tenacity import retry, stop_after_attempt, wait_exponential
-from dateutil import parser as date_parser
-import trafilatura
 
-from ingestion.sources import load_sources, load_region_sources
-from playwright.async_api import async_playwright
+from ingestion.sources import CompiledSource, load_sources, load_region_sources
+from ingestion.crawler import CrawlLimiter
+from ingestion.url_index import KnownUrlIndex, get_known_url_index
+from ingestion.http_cache import ListingValidatorCache, get_listing_cache
+from ingestion.crawl_schedule import CrawlSchedule, get_crawl_schedule
+from ingestion.browser import get_browser_pool
+from ingestion.http_client import crawl_http_client, fetch as http_fetch
+from ingestion.extraction import (
+    discover_article_urls,
+    parse_article_html,
+    parse_feed,
+    run_extraction,
+)
 from api.routes.articles import generate_slug
+from core.config import PIPELINE_QUEUE_SIZE
 
 # -------------------------
 # Logging
 # -------------------------
 logger = logging.getLogger(__name__)
 
-MIN_CONTENT_LENGTH = 200
-JST = timezone(timedelta(hours=9))
-
 # -------------------------
 # HTTP fetch (server-safe)
 # -------------------------
-@retry(stop=stop_after_attempt(2))
-def fetch_html(url: str, timeout: int = 50) -> str:
-    headers = {
-    "User-Agent": (
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/122.0.0.0 Safari/537.36"
-    ),
-    "Accept": (
-        "text/html,application/xhtml+xml,"
-        "application/xml;q=0.9,image/webp,*/*;q=0.8"
-    ),
-    "Accept-Language": "en-US,en;q=0.9",
-    "Connection": "keep-alive",
-    "Referer": "https://www.google.com/",
-    }
-    # headers = {
-    #     "User-Agent": "Mozilla/5.0 (compatible; NewsCrawler/1.0)"
-    # }
-    with httpx.Client(
-        headers=headers,
-        follow_redirects=True,
-        timeout=timeout
-    ) as client:
-        response = client.get(url)
-        response.raise_for_status()
-        return response.text
-    
-async def fetch_html_browser(url: str) -> str:
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(
-            headless=True,
-            args=[
-                "--no-sandbox",
-                "--disable-dev-shm-usage",
-            ],
-        )
+async def fetch_html(url: str) -> str:
+    response = await http_fetch(url)
+    return response.text
 
-        context = await browser.new_context(
-            user_agent=(
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/122.0.0.0 Safari/537.36"
-            )
-        )
 
-        page = await context.new_page()
+async def fetch_conditional(
+    url: str,
+    validators: ListingValidatorCache,
+):
+    """
+    Conditional GET using the stored ETag / Last-Modified.
+    Returns None when the server answers 304 Not Modified.
+    """
+    response = await http_fetch(url, headers=validators.request_headers(url))
+    if response.status_code == 304:
+        return None
+    validators.store_validators(url, response.headers)
+    return response
 
-        #  Block heavy resources (huge speed win)
-        await page.route(
-            "**/*",
-            lambda route, request: (
-                route.abort()
-                if request.resource_type in {"image", "font", "media"}
-                else route.continue_()
-            ),
-        )
 
+async def fetch_html_conditional(
+    url: str,
+    validators: ListingValidatorCache,
+) -> str | None:
+    response = await fetch_conditional(url, validators)
+    return response.text if response is not None else None
+
+    
+async def fetch_html_browser(url: str, wait_selector: str = "a") -> str:
+    async with get_browser_pool().page() as page:
         #  Load DOM only
         await page.goto(url, wait_until="domcontentloaded", timeout=30000)
 
-        #  Ensure <a> tags exist (very fast)
+        #  Ensure the content we need exists (very fast)
         try:
-            await page.wait_for_selector("a", timeout=5000)
+            await page.wait_for_selector(wait_selector, timeout=5000)
         except:
             pass
 
-        html = await page.content()
-        await browser.close()
-        return html    
-
-
-    
-    
-def discover_article_urls(html: str, base_url: str, patterns: list[str]) -> list[str]:
-    soup = BeautifulSoup(html, "lxml")
-    domain = urlparse(base_url).netloc
-    # print("domain===>", domain)
-    urls: set[str] = set()
-
-    for a in soup.find_all("a", href=True):
-        href = a["href"].split("#")[0]
-        # print("href===>", href)
-        url = urljoin(base_url, href)
-        # print("url===>", url)
-        parsed = urlparse(url)
-        # print("parsed===>", parsed)
-        # print("parsed netloc===>", parsed.netloc)
-        if parsed.netloc != domain:
-            continue
-
-        path = parsed.path
-        # print("paths=======>", path)
-        for pattern in patterns:
-            # Regex pattern
-            if pattern.startswith("^"):
-                if re.search(pattern, path):
-                    urls.add(url)
-                    break
-            # Simple substring
-            elif pattern in path:
-                urls.add(url)
-                break
-
-    logger.info("Discovered %d article URLs from %s", len(urls), base_url)
-    return list(urls)
+        return await page.content()
 
 
-def normalize_date(raw_date: str | None) -> datetime | None:
-    if not raw_date:
-        return None
-
-    raw = raw_date.lower().strip()
-    now = datetime.now(JST).replace(microsecond=0)
+async def fetch_article_html(url: str, source: CompiledSource | None = None) -> str | None:
+    if "coindesk.com" in url:
+        return await fetch_html_browser(url, wait_selector="main")
+    if source and source["name"] == "CoinDesk":
+        return await fetch_html_browser(url)
+    return await fetch_html(url)
 
-    # Relative time
-    match = re.search(
-        r"(\d+)\s*(second|sec|minute|min|hour|day|week|month|year)s?\s*ago",
-        raw
-    )
 
-    if match:
-        value = int(match.group(1))
-        unit = match.group(2)
-
-        if unit.startswith(("sec", "second")):
-            return now - timedelta(seconds=value)
-        if unit.startswith(("min", "minute")):
-            return now - timedelta(minutes=value)
-        if unit.startswith("hour"):
-            return now - timedelta(hours=value)
-        if unit.startswith("day"):
-            return now - timedelta(days=value)
-        if unit.startswith("week"):
-            return now - timedelta(weeks=value)
-        if unit.startswith("month"):
-            return now - timedelta(days=value * 30)
-        if unit.startswith("year"):
-            return now - timedelta(days=value * 365)
-
-    # Absolute date
-    try:
-        # IMPORTANT: inject time if missing
-        dt = date_parser.parse(raw, fuzzy=True, default=now)
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=JST)
-        else:
-            dt = dt.astimezone(JST)
-            
-        return dt.replace(microsecond=0)
-    except Exception:
-        return None
-    
-def unwrap_next_image(url: str) -> str:
-    if "_next/image" not in url:
-        return url
-
-    parsed = urlparse(url)
-    params = parse_qs(parsed.query)
-
-    real = params.get("url")
-    if real:
-        return unquote(real[0])
-
-    return url
-
-def normalize_image_url(url: str, base_url: str) -> str:
-    url = url.strip()
-
-    # 1️⃣ Handle protocol-relative URLs
-    if url.startswith("//"):
-        url = "https:" + url
-    elif url.startswith("/"):
-        url = urljoin(base_url, url)
-
-    # 2️⃣ Unwrap Next.js / Nuxt / Vercel images
-    parsed = urlparse(url)
-    if "/_next/image" in parsed.path:
-        qs = parse_qs(parsed.query)
-        if "url" in qs:
-            url = unquote(qs["url"][0])
-
-    # 3️⃣ CoinTelegraph CDN unwrap (optional)
-    if "images.cointelegraph.com" in url and "https://" in url:
-        url = url[url.rfind("https://"):]
-
-    # --- unwrap Decrypt proxy ---
-    if "img.decrypt.co" in url and "/plain/" in url:
-        url = url.split("/plain/", 1)[1]
-        url = unquote(url)
-
-    # remove @webp
-    if "@webp" in url:
-        url = url.split("@webp", 1)[0]
-    return url
-
-def parse_srcset(srcset: str) -> list[str]:
-    items = []
-    for part in srcset.split(","):
-        parts = part.strip().split()
-        if len(parts) == 2 and parts[1].endswith("w"):
-            try:
-                width = int(parts[1][:-1])
-                items.append((width, parts[0]))
-            except ValueError:
-                continue
-    # largest width first
-    items.sort(reverse=True)
-    return [url for _, url in items]
-
-def is_valid_image_url(
+async def extract_article(
     url: str,
-    allowed_extensions: list[str] | None,
-) -> bool:
-    parsed = urlparse(url)
-    path = parsed.path.lower()
-
-    # If extensions are configured → enforce them
-    if allowed_extensions:
-        for ext in allowed_extensions:
-            if path.endswith("." + ext):
-                return True
-
-        # No extension → ACCEPT (important)
-        if "." not in path.rsplit("/", 1)[-1]:
-            return True
-
-        # Has extension but not allowed → reject
-        return False
-
-    # No extension rules → accept everything
-    return True
-
-def extract_image_from_imgs(
-    html: str,
-    base_url: str,
-    image_patterns: list[str],
-    parent_classes: list[str] | None = None,
-    image_extensions: list[str] | None = None,
-) -> str | None:
-    
-    soup = BeautifulSoup(html, "lxml")
-    parents = []
-
-    # Collect parent elements
-    if parent_classes:
-        for cls in parent_classes:
-            found = soup.select(f".{cls}")
-            if found:
-                parents.extend(found)
-
-    # Fallback to entire document
-    if not parents:
-        parents = [soup]
-
-    candidate_images = []
-
-    for parent in parents:
-        for img in parent.find_all("img"):
-            src = (
-                img.get("data-src")
-                or img.get("data-lazy-src")
-                or img.get("data-original")
-                or img.get("src")
-                or img.get("srcset")
-            )
-            if not src:
-                continue
-            print("original src===>", src)
-            src = normalize_image_url(src, base_url)
-            
-            print("normalized src===>", src)
-
-            if not is_valid_image_url(
-                src,
-                image_extensions,
-            ):
-                continue
-
-            # Skip SVGs or logos
-            if src.lower().endswith(".svg") or "/themes/decrypt-media/" in src:
-                continue
-
-            # Must match image_patterns
-            if image_patterns and not any(p in src for p in image_patterns):
-                continue
-
-            # Try to get image width/height from attributes
-            width = img.get("width")
-            height = img.get("height")
-            size = 0
-            try:
-                size = int(width) * int(height)
-            except (TypeError, ValueError):
-                # fallback to 0 if not available
-                size = 0
-
-            # Check srcset for higher resolution
-            srcset = img.get("srcset")
-            if srcset:
-                # Pick the largest width in srcset
-                matches = re.findall(r"(\S+)\s+(\d+)x", srcset)
-                for m_url, m_w in matches:
-                    try:
-                        m_w = int(m_w)
-                        if m_w > size:
-                            candidate_images.append((m_w, normalize_image_url(m_url, base_url)))
-                    except:
-                        continue
-
-            candidate_images.append((size, src))
-
-    # Return the image with the largest size
-    if candidate_images:
-        # sort by size descending
-        candidate_images.sort(key=lambda x: x[0], reverse=True)
-        return candidate_images[0][1]
-
-    return None
-
-
-async def fetch_coindesk_main(url: str) -> str | None:
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True, args=["--no-sandbox"])
-        page = await browser.new_page()
-
-        # Block unnecessary resources
-        async def block_resources(route):
-            if route.request.resource_type in ["image", "stylesheet", "font", "media"]:
-                await route.abort()
-            else:
-                await route.continue_()
-        await page.route("**/*", block_resources)
-
-        await page.goto(url, timeout=20000)
-        await page.wait_for_selector("main", timeout=10000)
-
-        html = await page.content()
-        await browser.close()
-
-    soup = BeautifulSoup(html, "lxml")
-    main_tag = soup.find("main")
-    return str(main_tag) if main_tag else None
-
-
-def is_recent(publish_date, days: int = 2) -> bool:
-    if not publish_date:
-        return None
-    
-    if publish_date.tzinfo is None:
-        publish_date = publish_date.replace(tzinfo=timezone.utc)
-    
-    now = datetime.now(timezone.utc)
-    return publish_date >= (now-timedelta(days=days))
-
-async def extract_article(url: str) -> dict | None:
-    
-    if "coindesk.com" in url:
-        main_html = await fetch_coindesk_main(url)
-        if not main_html:
-            return None
-        downloaded = f"<html><body>{main_html}</body></html>"
-    else:
-        downloaded = trafilatura.fetch_url(url)
+    source: CompiledSource | None = None,
+    feed_entry: dict | None = None,
+) -> dict | None:
+    """
+    Download the article page once; text, metadata and lead image are
+    then parsed from that single HTML document in the extraction pool.
+    """
+    downloaded = await fetch_article_html(url, source)
     if not downloaded:
         return None
 
-    metadata = trafilatura.metadata.extract_metadata(downloaded)
-    text = trafilatura.extract(
-        downloaded,
-        include_comments=False,
-        include_tables=False
+    return await run_extraction(
+        parse_article_html, downloaded, url, source, feed_entry
     )
 
-    if not text or len(text.strip()) < MIN_CONTENT_LENGTH:
-        return None
-
-    publish_date = normalize_date(metadata.date if metadata else None)
-    
-    if not is_recent(publish_date, days=10):
-       return None 
-
-    return {
-        "title": metadata.title if metadata else None,
-        "content": text.strip(),
-        "publish_date": publish_date.isoformat() if publish_date else None,
-        "url": metadata.url if metadata and metadata.url else url,
-    }
-
-def is_url_restricted(url:str, source: dict) -> bool:
-    restrictions = source.get("url_restriction")
-    if not restrictions:
-        return False
-    
-    return any(restricted in url for restricted in restrictions)
+def is_url_restricted(url:str, source: CompiledSource) -> bool:
+    return any(restricted in url for restricted in source.url_restrictions)
 
 
 async def scrape_videos() -> list[dict]:
     sources = load_sources()
+    pool = get_browser_pool()
     all_articles: list[dict] = []
 
     for source in sources:
@@ -433,14 +113,7 @@ async def scrape_videos() -> list[dict]:
                 BASE_URL = "https://www.khaleejtimes.com"
                 results = []
 
-                async with async_playwright() as p:
-                    browser = await p.chromium.launch(
-                        headless=True,
-                        args=["--no-sandbox"]
-                    )
-                    context = await browser.new_context()
-                    page = await context.new_page()
-
+                async with pool.page(block_resources=False) as page:
                     await page.goto(
                         BASE_URL,
                         wait_until="domcontentloaded",
@@ -488,21 +161,11 @@ async def scrape_videos() -> list[dict]:
                             "image": image_url,
                         })
 
-                    await context.close()
-                    await browser.close()
-
-                # 🔹 NOW process articles (outside Playwright)
+                # 🔹 NOW process articles (listing page is back in the pool)
                 for item in results:
                     article = await extract_article(item["href"])
                     iframe_src = ""
-                    async with async_playwright() as p:
-                        browser = await p.chromium.launch(
-                            headless=True,
-                            args=["--no-sandbox"]
-                        )
-                        context = await browser.new_context()
-                        page = await context.new_page()
-
+                    async with pool.page() as page:
                         await page.goto(
                             item["href"],
                             wait_until="domcontentloaded",
@@ -517,9 +180,6 @@ async def scrape_videos() -> list[dict]:
                         else:
                             print("Iframe not found")
 
-                        # Step 5: Close the browser
-                        await context.close()
-                        await browser.close()
                     video_article = {
                         "name": source["name"],
                         "country": source["country"],
@@ -544,183 +204,324 @@ async def scrape_videos() -> list[dict]:
 
     return all_articles
 
-# @retry(
-#     stop=stop_after_attempt(3),
-#     wait=wait_exponential(min=1, max=10),
-#     reraise=True,
-# )
-async def scrape_all_sources() -> list[dict]:
-    sources = load_sources()
-    all_articles: list[dict] = []
+async def fetch_listing_html(
+    source: CompiledSource,
+    validators: ListingValidatorCache | None = None,
+) -> str | None:
+    """
+    Fetch a listing page. Returns None when the page has not changed
+    since the last crawl (304, or an identical body hash).
+    """
+    url = source["url"]
+
+    if source["name"] in ["CoinDesk", "cryptotimes"]:
+        html = await fetch_html_browser(url)
+    elif validators is not None:
+        # "trafilatura" and "httpx" strategies both go through the shared client
+        html = await fetch_html_conditional(url, validators)
+        if html is None:
+            logger.info("Listing not modified (304): %s", url)
+            return None
+    else:
+        html = await fetch_html(url)
 
-    for source in sources:
-        logger.info("Scraping source: %s", source["name"])
+    if html and validators is not None and not validators.has_changed(url, html):
+        logger.info("Listing body unchanged: %s", url)
+        return None
+    return html
+
+
+async def fetch_listing_feed(
+    source: CompiledSource,
+    validators: ListingValidatorCache | None = None,
+) -> bytes | None:
+    """
+    Fetch an RSS / Atom / sitemap document as raw bytes so the XML
+    parser can honour its declared encoding. Same not-modified rules as
+    fetch_listing_html.
+    """
+    url = source["url"]
+
+    if validators is not None:
+        response = await fetch_conditional(url, validators)
+        if response is None:
+            logger.info("Feed not modified (304): %s", url)
+            return None
+    else:
+        response = await http_fetch(url)
 
-        try:
-            strategy = source.get("fetch_strategy", "httpx")
+    body = response.content
+    if body and validators is not None and not validators.has_changed(url, body):
+        logger.info("Feed body unchanged: %s", url)
+        return None
+    return body
 
-            if strategy == "trafilatura":
-                html = trafilatura.fetch_url(source["url"])
-            else:
-                if source["name"] in ["CoinDesk", "cryptotimes"]:
-                    html = await fetch_html_browser(source["url"])
-                else:
-                    html = fetch_html(source["url"])
-            if not html:
-                logger.warning(
-                    "No HTML returned",
-                    source=source["name"],
-                    url=source["url"],
-                )
-                continue
 
-            article_urls = discover_article_urls(
-                html,
+async def scrape_article(
+    url: str,
+    source: CompiledSource,
+    feed_entry: dict | None = None,
+) -> dict | None:
+    article = await extract_article(url, source, feed_entry)
+
+    if not article:
+        return None
+
+    print("image_url===>", article["image_url"])
+    article["discovered_url"] = url
+    article["listing_url"] = source["url"]
+    article["name"] = source["name"]
+    article["country"] = source["country"]
+    article["credibility_score"] = 0
+    return article
+
+
+async def scrape_source(
+    source: CompiledSource,
+    limiter: CrawlLimiter,
+    known_urls: KnownUrlIndex | None = None,
+    validators: ListingValidatorCache | None = None,
+    schedule: CrawlSchedule | None = None,
+    emit=None,
+    pending: asyncio.Semaphore | None = None,
+) -> list[dict]:
+    """
+    Crawl one source. With `emit`, each article is handed to
+    `await emit(article)` as soon as it is extracted and nothing is
+    accumulated; otherwise the source's articles are returned.
+
+    With `pending`, a slot is acquired before each article fetch. An
+    emitted article keeps its slot until the consumer releases it, so
+    no new page is fetched while the consumer is that far behind.
+    """
+    logger.info("Scraping source: %s", source["name"])
+    is_feed = source.get("fetch_strategy") == "feed"
+    feed_entries: dict[str, dict] = {}
+
+    try:
+        async with limiter.slot(source["url"]):
+            if is_feed:
+                listing = await fetch_listing_feed(source, validators)
+            else:
+                listing = await fetch_listing_html(source, validators)
+        if not listing:
+            logger.info(
+                "No new listing content: source=%s url=%s",
+                source["name"],
                 source["url"],
-                source["article_url_patterns"],
             )
-
+            if schedule is not None:
+                schedule.record(source["url"], None)
+            return []
+
+        if is_feed:
+            entries = await run_extraction(
+                parse_feed,
+                listing,
+                source["url"],
+                source.url_matcher,
+            )
+            feed_entries = {entry["url"]: entry for entry in entries}
+            article_urls = list(feed_entries)
+        else:
+            article_urls = await run_extraction(
+                discover_article_urls,
+                listing,
+                source["url"],
+                source.url_matcher,
+            )
+        if schedule is not None:
+            interval = schedule.record(source["url"], article_urls)
+            logger.info(
+                "Next crawl of %s in %ds",
+                source["url"],
+                interval,
+            )
+        if known_urls is not None:
+            discovered = len(article_urls)
+            article_urls = known_urls.filter_new(article_urls)
+            logger.info(
+                "Skipping %d known URLs from %s",
+                discovered - len(article_urls),
+                source["name"],
+            )
+            if feed_entries:
+                # Same image already stored → same story re-published; skip the page fetch
+                article_urls = [
+                    url for url in article_urls
+                    if not known_urls.has_image(feed_entries[url]["image_url"])
+                ]
+
+    except Exception as e:
+        logger.error(
+            "Source scrape failed: source=%s url=%s error=%s",
+            source["name"],
+            source["url"],
+            str(e),
+            exc_info=True,
+        )
+        if schedule is not None:
+            schedule.record_failure(source["url"])
+        if validators is not None:
+            validators.discard(source["url"])
+        return []
+
+    async def scrape_one(url: str) -> dict | None:
+        if pending is not None:
+            await pending.acquire()
+        article = None
+        try:
+            async with limiter.slot(url):
+                article = await scrape_article(url, source, feed_entries.get(url))
         except Exception as e:
-            logger.error(
-                "Source scrape failed",
-                source=source["name"],
-                url=source["url"],
-                error=str(e),
-                exc_info=True,
+            logger.warning(
+                "Article extraction failed: source=%s url=%s error=%s",
+                source["name"],
+                url,
+                str(e),
             )
-            continue
-
-        # ---- article loop ----
-        for url in article_urls:
-            try:
-                if is_url_restricted(url, source):
-                    continue
-                
-                article = await extract_article(url)
-                
-                if not article:
-                    continue
-                
-                if source["name"] == "CoinDesk":
-                    article_html = await fetch_html_browser(url)
-                else:
-                    article_html = fetch_html(url)
-                # print("image_url_patterns", source.get("image_url_patterns", []))
-                image_url = extract_image_from_imgs(
-                    html=article_html,
-                    base_url=url,
-                    image_patterns=source.get("image_url_patterns", []),
-                    parent_classes=source.get("image_parent_classes"),
-                    image_extensions=source.get("image_extensions"),
-                )
-                # print("parent_classes", source.get("image_parent_classes"))
-                print("image_url===>", image_url)
-                article["name"] = source["name"]
-                article["country"] = source["country"]
-                article["credibility_score"] = 0
-                article["image_url"] = image_url
-                
-                all_articles.append(article)
-
-            except Exception as e:
-                logger.warning(
-                    "Article extraction failed",
-                    source=source["name"],
-                    url=url,
-                    error=str(e),
+            if validators is not None:
+                # keep the listing "changed" so this article is retried next cycle
+                validators.discard(source["url"])
+        if article and emit is not None:
+            await emit(article)  # the consumer releases the pending slot
+            return None
+        if pending is not None:
+            pending.release()
+        return article
+
+    # ---- article loop (concurrent, bounded by the limiter) ----
+    results = await asyncio.gather(*(
+        scrape_one(url)
+        for url in article_urls
+        if not is_url_restricted(url, source)
+    ))
+    return [article for article in results if article]
+
+
+async def crawl_sources(
+    sources: list[CompiledSource],
+    known_urls: KnownUrlIndex | None = None,
+    emit=None,
+    pending: asyncio.Semaphore | None = None,
+) -> list[dict]:
+    """
+    Scrape every due source concurrently. Listing pages and article pages
+    share one CrawlLimiter and one pooled HTTP client, so the global and
+    per-host limits hold across the whole run and connections are reused.
+    Articles come back in source order.
+
+    URLs already in `known_urls` are dropped right after discovery and
+    never reach extraction. Listing pages that have not changed since the
+    last crawl are skipped entirely, and sources whose adaptive interval
+    hasn't elapsed are not fetched at all. New listing validators stay
+    staged until the caller stores the articles and calls commit_crawl.
+    """
+    limiter = CrawlLimiter()
+    validators = get_listing_cache()
+    schedule = get_crawl_schedule()
+
+    due_sources = [s for s in sources if schedule.is_due(s["url"])]
+    logger.info("Crawling %d of %d sources", len(due_sources), len(sources))
+
+    async with crawl_http_client():
+        per_source = await asyncio.gather(
+            *(
+                scrape_source(
+                    source, limiter, known_urls, validators, schedule, emit, pending
                 )
-                continue
-    logger.info(f"scrape_completed, article_count={len(all_articles)}")
-    return all_articles
+                for source in due_sources
+            )
+        )
+    await asyncio.to_thread(schedule.save)
+    return [article for articles in per_source for article in articles]
+
+
+async def commit_crawl(sources: list[CompiledSource]) -> None:
+    """
+    Apply the listing validators staged while crawling `sources`. Call it
+    only after the crawled articles are stored: a listing whose articles
+    failed to fetch or save must look changed to the next crawl.
+    """
+    validators = get_listing_cache()
+    validators.commit(source["url"] for source in sources)
+    await asyncio.to_thread(validators.save)
+
+
+async def iter_crawl_sources(
+    sources: list[CompiledSource],
+    known_urls: KnownUrlIndex | None = None,
+    max_pending: int = PIPELINE_QUEUE_SIZE,
+) -> AsyncIterator[dict]:
+    """
+    Stream articles out of crawl_sources as they are extracted. At most
+    `max_pending` articles are being fetched or wait in the queue at any
+    time: an article fetch only starts once the consumer has taken an
+    earlier article, so a slow consumer caps the crawl's memory.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    pending = asyncio.Semaphore(max_pending)
+    finished = object()
+
+    async def produce():
+        try:
+            await crawl_sources(sources, known_urls, emit=queue.put, pending=pending)
+        finally:
+            await queue.put(finished)
 
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            article = await queue.get()
+            if article is finished:
+                break
+            pending.release()
+            yield article
+        await producer  # surface crawl errors
+    finally:
+        if not producer.done():
+            producer.cancel()
 
-async def scrape_region_sources() -> list[dict]:
-    sources = load_region_sources()
-    all_articles: list[dict] = []
 
-    for source in sources:
-        logger.info("Scraping source: %s", source["name"])
+async def commit_all_sources() -> None:
+    await commit_crawl(load_sources())
 
-        try:
-            strategy = source.get("fetch_strategy", "httpx")
 
-            if strategy == "trafilatura":
-                html = trafilatura.fetch_url(source["url"])
-            else:
-                if source["name"] in ["CoinDesk", "cryptotimes"]:
-                    html = await fetch_html_browser(source["url"])
-                else:
-                    html = fetch_html(source["url"])
-            if not html:
-                logger.warning(
-                    "No HTML returned",
-                    source=source["name"],
-                    url=source["url"],
-                )
-                continue
+async def iter_all_sources() -> AsyncIterator[dict]:
+    sources = load_sources()
+    known_urls = get_known_url_index()
+    await asyncio.to_thread(known_urls.refresh)
+    count = 0
+    async for article in iter_crawl_sources(sources, known_urls):
+        count += 1
+        yield article
+    logger.info(f"scrape_completed, article_count={count}")
 
-            article_urls = discover_article_urls(
-                html,
-                source["url"],
-                source["article_url_patterns"],
-            )
 
-        except Exception as e:
-            logger.error(
-                "Source scrape failed",
-                source=source["name"],
-                url=source["url"],
-                error=str(e),
-                exc_info=True,
-            )
-            continue
+# @retry(
+#     stop=stop_after_attempt(3),
+#     wait=wait_exponential(min=1, max=10),
+#     reraise=True,
+# )
+async def scrape_all_sources() -> list[dict]:
+    return [article async for article in iter_all_sources()]
 
-        # ---- article loop ----
-        for url in article_urls:
-            try:
-                if is_url_restricted(url, source):
-                    continue
-                
-                article = await extract_article(url)
-                
-                if not article:
-                    continue
-                
-                if source["name"] == "CoinDesk":
-                    article_html = await fetch_html_browser(url)
-                else:
-                    article_html = fetch_html(url)
-                # print("image_url_patterns", source.get("image_url_patterns", []))
-                image_url = extract_image_from_imgs(
-                    html=article_html,
-                    base_url=url,
-                    image_patterns=source.get("image_url_patterns", []),
-                    parent_classes=source.get("image_parent_classes"),
-                    image_extensions=source.get("image_extensions"),
-                )
-                
-                # print("parent_classes", source.get("image_parent_classes"))
-                if image_url:
-                    image_url = (
-                        image_url
-                        .replace("hw120", "hd640")
-                        .replace("comm_L", "hd640")
-                    )
-                print("image_url===>", image_url)
-                article["name"] = source["name"]
-                article["country"] = source["country"]
-                article["credibility_score"] = 0
-                article["image_url"] = image_url
-                
-                all_articles.append(article)
-
-            except Exception as e:
-                logger.warning(
-                    "Article extraction failed",
-                    source=source["name"],
-                    url=url,
-                    error=str(e),
-                )
-                continue
+
+async def commit_region_sources() -> None:
+    await commit_crawl(load_region_sources())
+
+
+async def scrape_region_sources() -> list[dict]:
+    sources = load_region_sources()
+    all_articles = await crawl_sources(sources)
+
+    for article in all_articles:
+        if article["image_url"]:
+            article["image_url"] = (
+                article["image_url"]
+                .replace("hw120", "hd640")
+                .replace("comm_L", "hd640")
+            )
+        print("image_url===>", article["image_url"])
     logger.info(f"region_scrape_completed, article_count={len(all_articles)}")
-    return all_articles
\ No newline at end of file
+    return all_articles
@@ -1,17 +1,96 @@
+import re
+import threading
 import yaml
+from dataclasses import dataclass, field
 from pathlib import Path
 
 CONFIG_PATH = Path(__file__).parent / "sources.yaml"
 REGION_PATH = Path(__file__).parent / "regional_sources.yaml"
-def load_sources():
-    with open(CONFIG_PATH, "r") as f:
-        data = yaml.safe_load(f)
-    return data["sources"]
-
-def load_region_sources():
-    with open(REGION_PATH, "r") as f:
-        data = yaml.safe_load(f)
-    return data["sources"]
+
+
+def compile_url_patterns(patterns: list[str] | None) -> re.Pattern | None:
+    """
+    Fold a source's article_url_patterns into one regex.
+    Patterns starting with "^" are regexes on the URL path; anything else
+    is a plain substring, escaped so it matches literally.
+    """
+    parts = [
+        p if p.startswith("^") else re.escape(p)
+        for p in (patterns or [])
+    ]
+    if not parts:
+        return None
+    return re.compile("|".join(f"(?:{p})" for p in parts))
+
+
+@dataclass(frozen=True)
+class CompiledSource:
+    """
+    One source entry from YAML plus its precompiled rules.
+    Supports dict-style access (source["name"], source.get(...)) so it
+    can be used wherever the raw config dict was used before.
+    """
+    config: dict
+    url_matcher: re.Pattern | None = None
+    url_restrictions: tuple[str, ...] = ()
+    image_patterns: tuple[str, ...] = ()
+    image_extensions: tuple[str, ...] = ()
+    image_parent_classes: tuple[str, ...] = field(default=())
+
+    @classmethod
+    def from_config(cls, config: dict) -> "CompiledSource":
+        return cls(
+            config=config,
+            url_matcher=compile_url_patterns(config.get("article_url_patterns")),
+            url_restrictions=tuple(config.get("url_restriction") or ()),
+            image_patterns=tuple(config.get("image_url_patterns") or ()),
+            image_extensions=tuple(config.get("image_extensions") or ()),
+            image_parent_classes=tuple(config.get("image_parent_classes") or ()),
+        )
+
+    def __getitem__(self, key):
+        return self.config[key]
+
+    def get(self, key, default=None):
+        return self.config.get(key, default)
+
+
+class SourceRegistry:
+    """
+    Parses a sources YAML file once and re-parses it only when the
+    file's mtime changes, so edits are picked up without a restart.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._mtime: int | None = None
+        self._sources: list[CompiledSource] = []
+        self._lock = threading.Lock()
+
+    def sources(self) -> list[CompiledSource]:
+        mtime = self.path.stat().st_mtime_ns
+        if mtime != self._mtime:
+            with self._lock:
+                if mtime != self._mtime:
+                    with open(self.path, "r") as f:
+                        data = yaml.safe_load(f)
+                    self._sources = [
+                        CompiledSource.from_config(src)
+                        for src in data["sources"]
+                    ]
+                    self._mtime = mtime
+        return self._sources
+
+
+SOURCE_REGISTRY = SourceRegistry(CONFIG_PATH)
+REGION_SOURCE_REGISTRY = SourceRegistry(REGION_PATH)
+
+
+def load_sources() -> list[CompiledSource]:
+    return SOURCE_REGISTRY.sources()
+
+def load_region_sources() -> list[CompiledSource]:
+    return REGION_SOURCE_REGISTRY.sources()
     
 def get_source_credibility_map(default: float = 0.5) -> dict[str, float]:
     sources = load_sources()
@@ -0,0 +1,74 @@
+import threading
+from typing import Iterable
+
+from sqlalchemy import select
+
+from db.session import SessionLocal
+from db.models import Article
+
+
+class KnownUrlIndex:
+    """
+    In-memory set of article URLs (and their image URLs) already stored
+    in the `articles` table.
+
+    The first refresh loads every URL; later refreshes only read rows with
+    an id above the highest one seen, so keeping it current is cheap.
+    """
+
+    def __init__(self):
+        self._urls: set[str] = set()
+        self._images: set[str] = set()
+        self._max_id = 0
+        self._lock = threading.Lock()
+
+    def refresh(self) -> int:
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                select(Article.id, Article.url, Article.image_url)
+                .where(Article.id > self._max_id)
+                .order_by(Article.id)
+            ).all()
+        finally:
+            db.close()
+
+        with self._lock:
+            for article_id, url, image_url in rows:
+                if url:
+                    self._urls.add(url)
+                if image_url:
+                    self._images.add(image_url)
+                self._max_id = max(self._max_id, article_id)
+        return len(rows)
+
+    def add(self, *urls: str | None):
+        with self._lock:
+            self._urls.update(u for u in urls if u)
+
+    def add_image(self, image_url: str | None):
+        if image_url:
+            with self._lock:
+                self._images.add(image_url)
+
+    def has_image(self, image_url: str | None) -> bool:
+        return bool(image_url) and image_url in self._images
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._urls
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+    def filter_new(self, urls: Iterable[str]) -> list[str]:
+        return [u for u in urls if u not in self._urls]
+
+
+_known_url_index: KnownUrlIndex | None = None
+
+
+def get_known_url_index() -> KnownUrlIndex:
+    global _known_url_index
+    if _known_url_index is None:
+        _known_url_index = KnownUrlIndex()
+    return _known_url_index
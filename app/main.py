@@ -1,14 +1,17 @@
+from dotenv import load_dotenv
+
+# Before any app import: core.config reads the environment at import time
+load_dotenv()
+
 import uvicorn
 from fastapi import FastAPI
 from api.routes import truth, articles, opinions, region
 from core.scheduler import start_scheduler
 from core.logging import init_logging
 from db.init_db import init_db
-from dotenv import load_dotenv
 # from ml.embeddings import load_embedding_model
 from fastapi.middleware.cors import CORSMiddleware
 
-load_dotenv()
 def create_app() -> FastAPI:
     init_logging()
 
@@ -1,6 +1,6 @@
 import numpy as np
 from ml.embeddings import embed, embed_batch
-from ml.llm import call_llm
+from ml.llm import acall_llm, call_llm
 from db.models import Claim, UnionFind, ClaimSupport, Article
 from collections import defaultdict
 import uuid
@@ -35,28 +35,41 @@ def cosine_similarity(a, b):
 
 
 
-def llm_contradiction_check(text1: str, text2: str) -> str:
-    prompt = """
+CONTRADICTION_PROMPT = """
     Determine the relationship between two claims.
 
     Return JSON with:
     - relationship: supporting | contradicting | unrelated
     """
 
+
+def _relationship(result) -> str:
+    if not isinstance(result, dict):
+        print("LLM RAW RESULT:", result)
+        return "unrelated"
+
+    return result.get("relationship", "unrelated")
+
+
+def llm_contradiction_check(text1: str, text2: str) -> str:
     try:
         result = call_llm(
-            prompt,
+            CONTRADICTION_PROMPT,
             f"CLAIM A: {text1}\nCLAIM B: {text2}"
         )
     except TypeError as e:
         print("LLM CALL SIGNATURE ERROR:", e)
         return "unrelated"
 
-    if not isinstance(result, dict):
-        print("LLM RAW RESULT:", result)
-        return "unrelated"
+    return _relationship(result)
 
-    return result.get("relationship", "unrelated")
+
+async def llm_contradiction_check_async(text1: str, text2: str) -> str:
+    result = await acall_llm(
+        CONTRADICTION_PROMPT,
+        f"CLAIM A: {text1}\nCLAIM B: {text2}"
+    )
+    return _relationship(result)
 
 
 def compare_claims(
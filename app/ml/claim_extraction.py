@@ -1,8 +1,9 @@
 
-from ml.llm import call_llm
+from ml.llm import acall_llm, call_llm
+from ml.prompt_input import fit_article
 from typing import Any, Dict, List
 
-def extract_claims(text: str):
+def _extract_claims_prompt(text: str) -> tuple[str, str]:
     prompt = """
     Extract factual claims from the text.
 
@@ -14,9 +15,10 @@ def extract_claims(text: str):
     Only include explicit claims.
     """
 
-    return call_llm(prompt, text)
+    return prompt, text
 
-def analyze_article(title: str, content: str) -> Dict[str, Any]:
+def _analyze_article_prompt(title: str, content: str) -> tuple[str, str]:
+    content = fit_article(content, "analyze_article")
 
     system_prompt = """
     TASK:
@@ -210,9 +212,10 @@ def analyze_article(title: str, content: str) -> Dict[str, Any]:
     {content}
     """
 
-    return call_llm(system_prompt, user_text)
+    return system_prompt, user_text
   
-def analyze_article_no_claim(title: str, content: str) -> Dict[str, Any]:
+def _analyze_article_no_claim_prompt(title: str, content: str) -> tuple[str, str]:
+    content = fit_article(content, "analyze_article_no_claim")
 
     system_prompt = """
     TASK:
@@ -388,9 +391,10 @@ def analyze_article_no_claim(title: str, content: str) -> Dict[str, Any]:
     {content}
     """
 
-    return call_llm(system_prompt, user_text)
+    return system_prompt, user_text
 
-def analyze_article1(title: str, content: str) -> Dict[str, Any]:
+def _analyze_article1_prompt(title: str, content: str) -> tuple[str, str]:
+    content = fit_article(content, "analyze_article1")
 
     system_prompt = """
     TASK:
@@ -519,9 +523,9 @@ def analyze_article1(title: str, content: str) -> Dict[str, Any]:
     {content}
     """
 
-    return call_llm(system_prompt, user_text)
+    return system_prompt, user_text
 
-def extract_info(title: str, content: str) -> Dict[str, Any]:
+def _extract_info_prompt(title: str, content: str) -> tuple[str, str]:
   system_prompt = """
     TASK:
     You are a professional newspaper reporter and editor writing for the Japanese edition of a global news media outlet.
@@ -594,10 +598,11 @@ def extract_info(title: str, content: str) -> Dict[str, Any]:
     {content}
     """
 
-  return call_llm(system_prompt, user_text)
+  return system_prompt, user_text
 
   
-def generate_uhalisi_posts(title: str, content: str) -> Dict[str, Any]:
+def _generate_uhalisi_posts_prompt(title: str, content: str) -> tuple[str, str]:
+  content = fit_article(content, "generate_uhalisi_posts")
   system_prompt = """
     TASK:
     You are a professional newspaper reporter and editor writing for the Japanese edition of a global news media outlet.
@@ -744,4 +749,65 @@ def generate_uhalisi_posts(title: str, content: str) -> Dict[str, Any]:
     {content}
     """
 
-  return call_llm(system_prompt, user_text)
\ No newline at end of file
+  return system_prompt, user_text
+
+
+# Fields the pipeline reads from each analysis (dotted = nested)
+NO_CLAIM_ANALYSIS_FIELDS = ("priority", "category", "ja.title", "ja.content", "summary", "new_title")
+REGIONAL_ANALYSIS_FIELDS = ("new_title", "new_content")
+
+
+def require_fields(result: Any, fields: tuple[str, ...]) -> None:
+    """Raise ValueError unless `result` has every field in `fields`."""
+    for field in fields:
+        value = result
+        for part in field.split("."):
+            if not isinstance(value, dict) or part not in value:
+                raise ValueError(f"LLM response missing {field!r}")
+            value = value[part]
+
+
+def validate_no_claim_analysis(result: Any) -> None:
+    require_fields(result, NO_CLAIM_ANALYSIS_FIELDS)
+
+
+def validate_regional_analysis(result: Any) -> None:
+    require_fields(result, REGIONAL_ANALYSIS_FIELDS)
+
+
+def extract_claims(text: str):
+    return call_llm(*_extract_claims_prompt(text))
+
+
+def analyze_article(title: str, content: str) -> Dict[str, Any]:
+    return call_llm(*_analyze_article_prompt(title, content))
+
+
+def analyze_article_no_claim(title: str, content: str) -> Dict[str, Any]:
+    return call_llm(
+        *_analyze_article_no_claim_prompt(title, content), validate=validate_no_claim_analysis
+    )
+
+
+async def analyze_article_no_claim_async(title: str, content: str) -> Dict[str, Any]:
+    return await acall_llm(
+        *_analyze_article_no_claim_prompt(title, content), validate=validate_no_claim_analysis
+    )
+
+
+def analyze_article1(title: str, content: str) -> Dict[str, Any]:
+    return call_llm(*_analyze_article1_prompt(title, content), validate=validate_regional_analysis)
+
+
+async def analyze_article1_async(title: str, content: str) -> Dict[str, Any]:
+    return await acall_llm(
+        *_analyze_article1_prompt(title, content), validate=validate_regional_analysis
+    )
+
+
+def extract_info(title: str, content: str) -> Dict[str, Any]:
+    return call_llm(*_extract_info_prompt(title, content))
+
+
+def generate_uhalisi_posts(title: str, content: str) -> Dict[str, Any]:
+    return call_llm(*_generate_uhalisi_posts_prompt(title, content))
@@ -1,102 +1,181 @@
+import asyncio
 import json
-from typing import Any
-import os
-from openai import OpenAI
+import time
+from typing import Any, Callable
 from tenacity import retry, stop_after_attempt, wait_exponential
-from core.config import OPENAI_API_KEY
-from anthropic import Anthropic
+from core.config import (
+    LLM_CACHE_ENABLED,
+    LLM_MAX_PARALLEL,
+    LLM_OUTPUT_TOKEN_RESERVE,
+    LLM_ROUTING,
+)
+from core.event_loop import get_loop, run_on_loop
+from ml.llm_cache import cache_key, get_llm_cache
+from ml.providers import provider_registry
+from ml.routing import get_provider_health, hedged_call
+from ml.tokens import count_tokens
 
+# All LLM traffic runs on one long-lived loop, so the pooled clients and
+# rate limiters in the provider registry are shared by every caller.
+LLM_LOOP = "llm"
 
-@retry(
-    stop=stop_after_attempt(2),
-    wait=wait_exponential(multiplier=1, min=2, max=10),
+SYSTEM_MESSAGE = (
+    "You are an information extraction engine. "
+    "Always respond with valid JSON only. "
+    "Do not include explanations or markdown."
 )
-def call_llm(system_prompt: str, user_text: str) -> Any:
-    """
-    Generic LLM call that enforces JSON output.
-    Used for claim extraction, comparison, truth evaluation, etc.
-    """
-    provider= os.getenv("AI_MODEL", "openai")
-    system_message = (
-        "You are an information extraction engine. "
-        "Always respond with valid JSON only. "
-        "Do not include explanations or markdown."
-    )
-    print("ai model provider===>", provider)
-    if provider== "openai":
-        client = OpenAI(api_key=OPENAI_API_KEY)
-        MODEL = "gpt-4o-mini"
-        response = client.chat.completions.create(
-        model=MODEL,
-        temperature=0.1,
-        messages=[
-            {
-                "role": "system",
-                "content": system_message,
-            },
-            {
-                "role": "user",
-                "content": f"{system_prompt}\n\nTEXT:\n{user_text}",
-            },
-        ],
-        )
-        content = response.choices[0].message.content.strip()
-    elif provider=="deepseek":
-        client = OpenAI(
-            api_key=os.getenv("DEEPSEEK_KEY"),
-            base_url="https://api.deepseek.com"
-        )
-        MODEL = "deepseek-chat"
-        response = client.chat.completions.create(
-        model=MODEL,
-        temperature=0.1,
-        response_format={"type": "json_object"},
-        messages=[
-            {
-                "role": "system",
-                "content": system_message,
-            },
-            {
-                "role": "user",
-                "content": f"{system_prompt}\n\nTEXT:\n{user_text}",
-            },
-        ],
-    )
 
+_parallel = asyncio.Semaphore(LLM_MAX_PARALLEL)
 
-        content = response.choices[0].message.content.strip()
-    else:
-        client = Anthropic(api_key=os.getenv("CLAUDE_API_KEY"))
 
-        response = client.messages.create(
-            model="claude-3-haiku-20240307",
-            max_tokens=4000,
+async def _complete(provider: str, system_prompt: str, user_text: str) -> str:
+    client = provider_registry.client(provider)
+    model = provider_registry.spec(provider).model
+    user_content = f"{system_prompt}\n\nTEXT:\n{user_text}"
+
+    if provider == "openai":
+        response = await client.chat.completions.create(
+            model=model,
             temperature=0.1,
-            system=(
-                system_message +
-                "\n\nYou MUST return strictly valid JSON. "
-                "Do not wrap in markdown. "
-                "Do not explain. "
-                "Return JSON only."
-            ),
             messages=[
-                {
-                    "role": "user",
-                    "content": f"{system_prompt}\n\nTEXT:\n{user_text}",
-                }
+                {"role": "system", "content": SYSTEM_MESSAGE},
+                {"role": "user", "content": user_content},
             ],
         )
+        return response.choices[0].message.content.strip()
+
+    if provider == "deepseek":
+        response = await client.chat.completions.create(
+            model=model,
+            temperature=0.1,
+            response_format={"type": "json_object"},
+            messages=[
+                {"role": "system", "content": SYSTEM_MESSAGE},
+                {"role": "user", "content": user_content},
+            ],
+        )
+        return response.choices[0].message.content.strip()
+
+    response = await client.messages.create(
+        model=model,
+        max_tokens=4000,
+        temperature=0.1,
+        system=(
+            SYSTEM_MESSAGE +
+            "\n\nYou MUST return strictly valid JSON. "
+            "Do not wrap in markdown. "
+            "Do not explain. "
+            "Return JSON only."
+        ),
+        messages=[{"role": "user", "content": user_content}],
+    )
+
+    # Claude returns list of content blocks
+    content = "".join(
+        block.text for block in response.content if block.type == "text"
+    ).strip()
+
+    # Remove accidental markdown wrapping
+    if content.startswith("```"):
+        content = content.strip("`")
+        content = content.replace("json", "").strip()
+    return content
 
-        # Claude returns list of content blocks
-        content = "".join(
-            block.text for block in response.content if block.type == "text"
-        ).strip()
 
-        # Remove accidental markdown wrapping
-        if content.startswith("```"):
-            content = content.strip("`")
-            content = content.replace("json", "").strip()
+@retry(
+    stop=stop_after_attempt(2),
+    wait=wait_exponential(multiplier=1, min=2, max=10),
+)
+async def _request(provider: str, system_prompt: str, user_text: str) -> Any:
+    model = provider_registry.spec(provider).model
+    prompt_tokens = count_tokens(SYSTEM_MESSAGE + system_prompt + user_text, model)
+
+    async with _parallel:
+        await provider_registry.limiter(provider).acquire(prompt_tokens + LLM_OUTPUT_TOKEN_RESERVE)
+        health = get_provider_health(provider)
+        started = time.monotonic()
+        try:
+            content = await _complete(provider, system_prompt, user_text)
+        except Exception:
+            health.record_failure()
+            raise
+        health.record_success(time.monotonic() - started)
+
     try:
         return json.loads(content)
     except json.JSONDecodeError as e:
-        raise ValueError(f"Invalid JSON from LLM: {content}") from e
\ No newline at end of file
+        raise ValueError(f"Invalid JSON from LLM: {content}") from e
+
+
+async def _gateway_call(
+    system_prompt: str,
+    user_text: str,
+    validate: Callable[[Any], None] | None = None,
+) -> Any:
+    """
+    `validate` raises ValueError for a parsed response the caller cannot
+    use. Such a response is never cached, and a cached one is dropped, so
+    the caller's retry asks the LLM again. SQLite cache I/O runs in a
+    thread to keep the gateway loop free.
+    """
+    provider = provider_registry.default
+    key = None
+    if LLM_CACHE_ENABLED:
+        # Retries, restarts and duplicate inputs are answered from disk
+        cache = get_llm_cache()
+        key = cache_key(
+            provider, provider_registry.spec(provider).model, system_prompt, user_text
+        )
+        cached = await asyncio.to_thread(cache.get, key)
+        if cached is not None:
+            try:
+                if validate is not None:
+                    validate(cached)
+                return cached
+            except ValueError:
+                await asyncio.to_thread(cache.delete, key)
+
+    answered_by = provider
+    if LLM_ROUTING == "hedged" and provider_registry.backup != provider:
+
+        async def request(name: str):
+            return name, await _request(name, system_prompt, user_text)
+
+        answered_by, result = await hedged_call(provider, provider_registry.backup, request)
+    else:
+        result = await _request(provider, system_prompt, user_text)
+    if validate is not None:
+        validate(result)
+    # The key names the primary's provider and model; a backup answer is not theirs
+    if key is not None and answered_by == provider:
+        await asyncio.to_thread(cache.put, key, result)
+    return result
+
+
+async def acall_llm(
+    system_prompt: str,
+    user_text: str,
+    validate: Callable[[Any], None] | None = None,
+) -> Any:
+    """
+    Async LLM call that enforces JSON output. Safe to await from any event
+    loop: the request is executed on the shared gateway loop.
+    """
+    gateway = get_loop(LLM_LOOP)
+    coro = _gateway_call(system_prompt, user_text, validate)
+    if asyncio.get_running_loop() is gateway:
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, gateway))
+
+
+def call_llm(
+    system_prompt: str,
+    user_text: str,
+    validate: Callable[[Any], None] | None = None,
+) -> Any:
+    """
+    Generic LLM call that enforces JSON output.
+    Used for claim extraction, comparison, truth evaluation, etc.
+    Blocks the calling thread; async code should await acall_llm instead.
+    """
+    return run_on_loop(LLM_LOOP, _gateway_call(system_prompt, user_text, validate))
@@ -0,0 +1,102 @@
+import logging
+import re
+import threading
+
+from core.config import (
+    ANALYZE_ARTICLE_INPUT_TOKENS,
+    ANALYZE_NO_CLAIM_INPUT_TOKENS,
+    ANALYZE_REGIONAL_INPUT_TOKENS,
+    UHALISI_POSTS_INPUT_TOKENS,
+)
+from ml.providers import provider_registry
+from ml.tokens import count_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+INPUT_TOKEN_BUDGETS = {
+    "analyze_article": ANALYZE_ARTICLE_INPUT_TOKENS,
+    "analyze_article_no_claim": ANALYZE_NO_CLAIM_INPUT_TOKENS,
+    "analyze_article1": ANALYZE_REGIONAL_INPUT_TOKENS,
+    "generate_uhalisi_posts": UHALISI_POSTS_INPUT_TOKENS,
+}
+
+# Page furniture is short and stands on its own line. Longer lines are
+# article text, whatever they start with (trafilatura emits a paragraph
+# per line)
+MAX_BOILERPLATE_CHARS = 60
+# Whole-line labels, with at most trailing separators
+BOILERPLATE_LINE = re.compile(
+    r"(?:advertisement|sponsored(?: content)?|read more|continue reading"
+    r"|related(?: articles| stories| news)?|share(?: this(?: article| story)?| on \w+)"
+    r"|follow us(?: on \w+)?|sign up(?: for (?:our|the) newsletter)?"
+    r"|subscribe(?: now| to (?:our|the) newsletter)?|click here(?: to read more)?"
+    r"|関連記事|広告|続きを読む)"
+    r"\s*[:：»›>…]*",
+    re.IGNORECASE,
+)
+# Credit and copyright notices, which carry punctuation of their own
+CREDIT_LINE = re.compile(
+    r"(?:(?:photo|image) (?:credit|by|courtesy)\b|©|copyright\s*(?:©|\(c\))?\s*\d{4}"
+    r"|all rights reserved|無断転載)",
+    re.IGNORECASE,
+)
+# Last sentence end in a cut: Latin and CJK terminators, or a paragraph break
+SENTENCE_END = re.compile(r"(?:[.!?](?=[\s\"')\]]|$)|[。！？]|\n\n)")
+
+_saved_tokens_total = 0
+_saved_lock = threading.Lock()
+
+
+def is_boilerplate(line: str) -> bool:
+    line = line.strip()
+    if not line or len(line) > MAX_BOILERPLATE_CHARS:
+        return False
+    return bool(BOILERPLATE_LINE.fullmatch(line) or CREDIT_LINE.match(line))
+
+
+def strip_boilerplate(text: str) -> str:
+    lines = [line for line in text.splitlines() if not is_boilerplate(line)]
+    text = "\n".join(lines)
+    text = re.sub(r"[ \t]+", " ", text)
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+def cut_at_sentence(text: str) -> str:
+    """Drop a trailing partial sentence, unless that would lose most of the text."""
+    last = None
+    for last in SENTENCE_END.finditer(text):
+        pass
+    if last is None or last.end() < len(text) // 2:
+        return text
+    return text[: last.end()].rstrip()
+
+
+def fit_article(content: str, prompt_type: str) -> str:
+    """
+    Prepare article text for an LLM prompt: strip boilerplate lines and
+    fit the result into the prompt type's token budget, cutting at a
+    sentence boundary. Logs the tokens saved.
+    """
+    global _saved_tokens_total
+
+    budget = INPUT_TOKEN_BUDGETS[prompt_type]
+    model = provider_registry.spec(provider_registry.default).model
+    original_tokens = count_tokens(content, model)
+
+    text = strip_boilerplate(content)
+    if count_tokens(text, model) > budget:
+        text = cut_at_sentence(truncate_to_tokens(text, budget, model))
+
+    saved = original_tokens - count_tokens(text, model)
+    if saved > 0:
+        with _saved_lock:
+            _saved_tokens_total += saved
+        logger.info(
+            "%s input trimmed %d → %d tokens (saved %d, %d total)",
+            prompt_type, original_tokens, original_tokens - saved, saved, _saved_tokens_total,
+        )
+    return text
+
+
+def saved_tokens_total() -> int:
+    return _saved_tokens_total
@@ -0,0 +1,166 @@
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any
+
+import anthropic
+import httpx
+import openai
+
+from core.config import (
+    OPENAI_RPM,
+    OPENAI_TPM,
+    OPENAI_TIMEOUT_SECONDS,
+    OPENAI_MAX_CONNECTIONS,
+    DEEPSEEK_RPM,
+    DEEPSEEK_TPM,
+    DEEPSEEK_TIMEOUT_SECONDS,
+    DEEPSEEK_MAX_CONNECTIONS,
+    ANTHROPIC_RPM,
+    ANTHROPIC_TPM,
+    ANTHROPIC_TIMEOUT_SECONDS,
+    ANTHROPIC_MAX_CONNECTIONS,
+)
+from core.rate_limit import TokenBucket
+
+
+@dataclass(frozen=True)
+class ProviderSpec:
+    name: str
+    model: str
+    api_key_env: str  # read when the client is built, after .env is loaded
+    rpm: int
+    tpm: int
+    timeout: float
+    max_connections: int
+    base_url: str | None = None
+
+
+class ProviderLimiter:
+    """Requests-per-minute and tokens-per-minute budget for one provider."""
+
+    def __init__(self, rpm: int, tpm: int):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+
+    async def acquire(self, tokens: int) -> None:
+        await self.requests.acquire(1)
+        await self.tokens.acquire(tokens)
+
+
+class ProviderRegistry:
+    """
+    One lazily built SDK client and rate limiter per provider for the
+    life of the process. Each client keeps a pool of keep-alive
+    connections, so TLS handshakes are paid once rather than per call.
+
+    API keys, AI_MODEL and LLM_BACKUP_PROVIDER are read from the
+    environment on first use rather than at import, so values that only
+    exist in .env are seen once main.py has loaded it.
+    """
+
+    def __init__(self, specs: dict[str, ProviderSpec]):
+        self.specs = specs
+        self._default: str | None = None
+        self._backup: str | None = None
+        self._clients: dict[str, Any] = {}
+        self._limiters: dict[str, ProviderLimiter] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def default(self) -> str:
+        if self._default is None:
+            ai_model = os.getenv("AI_MODEL", "openai")
+            # Anything that is not openai/deepseek has always meant Claude
+            self._default = ai_model if ai_model in ("openai", "deepseek") else "anthropic"
+        return self._default
+
+    @property
+    def backup(self) -> str:
+        if self._backup is None:
+            self._backup = os.getenv(
+                "LLM_BACKUP_PROVIDER", "deepseek" if self.default == "openai" else "openai"
+            )
+        return self._backup
+
+    def spec(self, name: str) -> ProviderSpec:
+        return self.specs[name]
+
+    def client(self, name: str):
+        with self._lock:
+            client = self._clients.get(name)
+            if client is None:
+                client = self._build_client(self.specs[name])
+                self._clients[name] = client
+            return client
+
+    def limiter(self, name: str) -> ProviderLimiter:
+        with self._lock:
+            limiter = self._limiters.get(name)
+            if limiter is None:
+                spec = self.specs[name]
+                limiter = ProviderLimiter(spec.rpm, spec.tpm)
+                self._limiters[name] = limiter
+            return limiter
+
+    @staticmethod
+    def _build_client(spec: ProviderSpec):
+        api_key = os.getenv(spec.api_key_env)
+        if not api_key:
+            # Never let an SDK fall back to another provider's key variable
+            raise RuntimeError(f"{spec.api_key_env} is not set")
+        limits = httpx.Limits(
+            max_connections=spec.max_connections,
+            max_keepalive_connections=spec.max_connections,
+        )
+        # SDK retries are disabled; retries and backoff happen in ml.llm
+        if spec.name == "anthropic":
+            return anthropic.AsyncAnthropic(
+                api_key=api_key,
+                timeout=spec.timeout,
+                max_retries=0,
+                http_client=anthropic.DefaultAsyncHttpxClient(
+                    timeout=spec.timeout, limits=limits
+                ),
+            )
+        return openai.AsyncOpenAI(
+            api_key=api_key,
+            base_url=spec.base_url,
+            timeout=spec.timeout,
+            max_retries=0,
+            http_client=openai.DefaultAsyncHttpxClient(timeout=spec.timeout, limits=limits),
+        )
+
+
+PROVIDERS = {
+    "openai": ProviderSpec(
+        name="openai",
+        model="gpt-4o-mini",
+        api_key_env="OPENAI_API_KEY",
+        rpm=OPENAI_RPM,
+        tpm=OPENAI_TPM,
+        timeout=OPENAI_TIMEOUT_SECONDS,
+        max_connections=OPENAI_MAX_CONNECTIONS,
+    ),
+    "deepseek": ProviderSpec(
+        name="deepseek",
+        model="deepseek-chat",
+        api_key_env="DEEPSEEK_KEY",
+        rpm=DEEPSEEK_RPM,
+        tpm=DEEPSEEK_TPM,
+        timeout=DEEPSEEK_TIMEOUT_SECONDS,
+        max_connections=DEEPSEEK_MAX_CONNECTIONS,
+        base_url="https://api.deepseek.com",
+    ),
+    "anthropic": ProviderSpec(
+        name="anthropic",
+        model="claude-3-haiku-20240307",
+        api_key_env="CLAUDE_API_KEY",
+        rpm=ANTHROPIC_RPM,
+        tpm=ANTHROPIC_TPM,
+        timeout=ANTHROPIC_TIMEOUT_SECONDS,
+        max_connections=ANTHROPIC_MAX_CONNECTIONS,
+    ),
+}
+
+provider_registry = ProviderRegistry(PROVIDERS)
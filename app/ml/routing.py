@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+from core.config import (
+    LLM_BREAKER_COOLDOWN_SECONDS,
+    LLM_BREAKER_ERROR_RATE,
+    LLM_BREAKER_MIN_CALLS,
+    LLM_BREAKER_WINDOW,
+    LLM_HEDGE_DEFAULT_DELAY_SECONDS,
+    LLM_HEDGE_MIN_DELAY_SECONDS,
+    LLM_HEDGE_PERCENTILE,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderHealth:
+    """
+    Recent latencies and outcomes for one provider.
+
+    Drives the hedge delay (a latency percentile) and a circuit breaker:
+    once the error rate over the window crosses the threshold the
+    provider is skipped for a cooldown, then a single probe request
+    decides whether it closes again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window: int = LLM_BREAKER_WINDOW,
+        min_calls: int = LLM_BREAKER_MIN_CALLS,
+        error_rate: float = LLM_BREAKER_ERROR_RATE,
+        cooldown: float = LLM_BREAKER_COOLDOWN_SECONDS,
+    ):
+        self.name = name
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.cooldown = cooldown
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.outcomes: deque[bool] = deque(maxlen=window)
+        self.opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if self._probing or time.monotonic() - self.opened_at < self.cooldown:
+            return False
+        # Half-open: let one request through to test the provider
+        self._probing = True
+        return True
+
+    def record_success(self, latency: float) -> None:
+        self.latencies.append(latency)
+        self.outcomes.append(True)
+        if self.opened_at is not None:
+            logger.info("LLM provider %s recovered, closing circuit", self.name)
+            self.opened_at = None
+            self._probing = False
+            self.outcomes.clear()
+
+    def release_probe(self) -> None:
+        """Free the half-open slot, e.g. when the probe was cancelled without an outcome."""
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.outcomes.append(False)
+        if self._probing:
+            self._probing = False
+            self.opened_at = time.monotonic()
+            return
+        if self.opened_at is None and len(self.outcomes) >= self.min_calls:
+            failures = self.outcomes.count(False)
+            if failures / len(self.outcomes) >= self.error_rate:
+                logger.warning(
+                    "LLM provider %s failing (%d/%d), opening circuit",
+                    self.name, failures, len(self.outcomes),
+                )
+                self.opened_at = time.monotonic()
+
+    def hedge_delay(self) -> float:
+        if len(self.latencies) < self.min_calls:
+            return LLM_HEDGE_DEFAULT_DELAY_SECONDS
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * LLM_HEDGE_PERCENTILE))
+        return max(LLM_HEDGE_MIN_DELAY_SECONDS, ordered[index])
+
+
+_health: dict[str, ProviderHealth] = {}
+
+
+def get_provider_health(name: str) -> ProviderHealth:
+    health = _health.get(name)
+    if health is None:
+        health = _health[name] = ProviderHealth(name)
+    return health
+
+
+def _admit(name: str, probes: list[ProviderHealth]) -> bool:
+    """allow() for `name`, remembering a half-open probe this call now owns."""
+    health = get_provider_health(name)
+    half_open = health.is_open
+    if not health.allow():
+        return False
+    if half_open:
+        probes.append(health)
+    return True
+
+
+async def hedged_call(
+    primary: str,
+    backup: str,
+    request: Callable[[str], Awaitable[Any]],
+) -> Any:
+    """
+    Run request(primary); if it has not answered within the primary's
+    p95 latency, or fails, also run request(backup) and return whichever
+    succeeds first. Providers with an open circuit are skipped.
+
+    A half-open probe taken here is released on the way out, whether its
+    request finished, lost the hedge or was cancelled while waiting for a
+    rate limit or a retry; a finished probe has already recorded its
+    outcome, so the release is a no-op.
+    """
+    probes: list[ProviderHealth] = []
+    pending: set[asyncio.Task] = set()
+    try:
+        if not _admit(primary, probes):
+            # Primary circuit open: go straight to the backup when it is healthy
+            if _admit(backup, probes):
+                return await request(backup)
+            return await request(primary)
+
+        pending = {asyncio.create_task(request(primary))}
+        done, pending = await asyncio.wait(
+            pending, timeout=get_provider_health(primary).hedge_delay()
+        )
+        if done:
+            first = done.pop()
+            if first.exception() is None or not _admit(backup, probes):
+                return first.result()
+        elif not _admit(backup, probes):
+            first = pending.pop()
+            return await first
+
+        logger.info("Hedging LLM request from %s to %s", primary, backup)
+        pending.add(asyncio.create_task(request(backup)))
+        error: BaseException | None = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+        for health in probes:
+            health.release_probe()
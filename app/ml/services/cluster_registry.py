@@ -1,9 +1,71 @@
-from ml.services.topic_clustering import TopicClusterIndex
+import logging
+import threading
+
+from sqlalchemy import select
+
+from db.models import ClusterEmbedding
+from db.session import SessionLocal
+from ml.services.cluster_store import PersistentClusterIndex
+
+logger = logging.getLogger(__name__)
 
 _cluster_index = None
+_lock = threading.Lock()
+
+
+def _rebuild_from_db(index: PersistentClusterIndex):
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            select(ClusterEmbedding.cluster_id, ClusterEmbedding.embedding)
+            .order_by(ClusterEmbedding.cluster_id)
+        ).all()
+        index.rebuild(rows)
+    except Exception:
+        logger.exception("Cluster index rebuild failed, starting empty")
+        index.ready.set()
+    finally:
+        db.close()
+
+
+def _catch_up_from_db(index: PersistentClusterIndex):
+    """
+    The snapshot and log can miss clusters whose DB commit landed just
+    before a crash; add every stored embedding the loaded index lacks.
+    """
+    db = SessionLocal()
+    try:
+        stored = db.execute(select(ClusterEmbedding.cluster_id)).scalars().all()
+        missing = sorted(set(stored) - index.known_cluster_ids())
+        if missing:
+            rows = db.execute(
+                select(ClusterEmbedding.cluster_id, ClusterEmbedding.embedding)
+                .where(ClusterEmbedding.cluster_id.in_(missing))
+                .order_by(ClusterEmbedding.cluster_id)
+            ).all()
+            logger.warning("Adding %d clusters missing from the index", index.add_missing(rows))
+    except Exception:
+        logger.exception("Cluster index catch-up failed, using it as loaded")
+    finally:
+        db.close()
+        index.ready.set()
+
 
-def get_cluster_index() -> TopicClusterIndex:
+def get_cluster_index() -> PersistentClusterIndex:
+    """
+    Warm-start the topic cluster index from its on-disk snapshot, then
+    add any cluster_embeddings rows it lacks. Without a snapshot it is
+    rebuilt from cluster_embeddings instead. Both run on a background
+    thread; searches and additions wait until it finishes.
+    """
     global _cluster_index
-    if _cluster_index is None:
-        _cluster_index = TopicClusterIndex()
-    return _cluster_index
\ No newline at end of file
+    with _lock:
+        if _cluster_index is None:
+            index = PersistentClusterIndex()
+            if index.load():
+                target, name = _catch_up_from_db, "cluster-index-catch-up"
+            else:
+                target, name = _rebuild_from_db, "cluster-index-rebuild"
+            threading.Thread(target=target, args=(index,), name=name, daemon=True).start()
+            _cluster_index = index
+        return _cluster_index
@@ -0,0 +1,199 @@
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Iterable
+
+import faiss
+import numpy as np
+
+from core.config import CLUSTER_INDEX_DIR, CLUSTER_INDEX_SNAPSHOT_EVERY
+from ml.services.topic_clustering import EMBED_DIM, TopicClusterIndex, normalize_embedding
+
+logger = logging.getLogger(__name__)
+
+# One fixed-size record per added cluster; a torn last record is dropped
+LOG_RECORD = np.dtype([("cluster_id", "<i8"), ("embedding", "<f4", (EMBED_DIM,))])
+# Not every faiss build can mmap flat indexes; read_index falls back below
+MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+
+def _atomic_write(path: Path, write) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    write(tmp)
+    os.replace(tmp, path)
+
+
+class PersistentClusterIndex(TopicClusterIndex):
+    """
+    TopicClusterIndex that survives restarts.
+
+    On disk: a FAISS snapshot (`clusters.faiss`), its cluster-id map
+    (`clusters.ids.npy`) and an append-only log of clusters added since
+    (`clusters.log`). The snapshot is memory-mapped read-only as `base`;
+    clusters added after it live in the inherited in-memory `index` and
+    are appended to the log before they become searchable. Every
+    CLUSTER_INDEX_SNAPSHOT_EVERY additions the two are merged into a new
+    snapshot and the log is truncated.
+    """
+
+    def __init__(self, directory: str = CLUSTER_INDEX_DIR):
+        super().__init__()
+        self.dir = Path(directory)
+        self.snapshot_path = self.dir / "clusters.faiss"
+        self.ids_path = self.dir / "clusters.ids.npy"
+        self.log_path = self.dir / "clusters.log"
+        self.base = None
+        self.base_ids = np.empty(0, dtype=np.int64)
+        self.ready = threading.Event()
+        self._lock = threading.RLock()
+
+    @property
+    def ntotal(self) -> int:
+        return (self.base.ntotal if self.base is not None else 0) + self.index.ntotal
+
+    def load(self) -> bool:
+        """
+        Load snapshot and replay the log. False if there is no snapshot.
+        Does not set `ready`: the caller first reconciles with the DB.
+        """
+        with self._lock:
+            if not (self.snapshot_path.exists() and self.ids_path.exists()):
+                return False
+            try:
+                base = faiss.read_index(str(self.snapshot_path), MMAP_FLAGS)
+            except RuntimeError:
+                base = faiss.read_index(str(self.snapshot_path))
+            base_ids = np.load(self.ids_path, mmap_mode="r")
+            if base.ntotal != len(base_ids):
+                logger.warning("Cluster index snapshot and id map disagree, ignoring snapshot")
+                return False
+
+            self.base, self.base_ids = base, base_ids
+            self.index = faiss.IndexFlatIP(EMBED_DIM)
+            self.cluster_ids = []
+            records = self._read_log()
+            if len(records):
+                self.index.add(np.ascontiguousarray(records["embedding"]))
+                self.cluster_ids = records["cluster_id"].tolist()
+            logger.info(
+                "Loaded cluster index: %d in snapshot, %d from log",
+                base.ntotal, len(records),
+            )
+            return True
+
+    def _read_log(self) -> np.ndarray:
+        try:
+            raw = self.log_path.read_bytes()
+        except FileNotFoundError:
+            return np.empty(0, dtype=LOG_RECORD)
+        usable = len(raw) - len(raw) % LOG_RECORD.itemsize
+        return np.frombuffer(raw[:usable], dtype=LOG_RECORD)
+
+    def rebuild(self, rows: Iterable[tuple[int, bytes]]) -> None:
+        """Replace the index with stored (cluster_id, embedding bytes) rows."""
+        with self._lock:
+            ids, vectors = [], []
+            for cluster_id, embedding in rows:
+                ids.append(cluster_id)
+                vectors.append(np.frombuffer(embedding, dtype=np.float32))
+            fresh = faiss.IndexFlatIP(EMBED_DIM)
+            if vectors:
+                fresh.add(normalize_embedding(np.stack(vectors)))
+            self._write_snapshot(fresh, np.asarray(ids, dtype=np.int64))
+            self.ready.set()
+            logger.info("Rebuilt cluster index from %d stored embeddings", len(ids))
+
+    def snapshot(self) -> None:
+        """Merge the in-memory additions into a new snapshot file."""
+        with self._lock:
+            merged = faiss.IndexFlatIP(EMBED_DIM)
+            if self.base is not None and self.base.ntotal:
+                merged.add(self.base.reconstruct_n(0, self.base.ntotal))
+            if self.index.ntotal:
+                merged.add(self.index.reconstruct_n(0, self.index.ntotal))
+            ids = np.concatenate([
+                np.asarray(self.base_ids, dtype=np.int64),
+                np.asarray(self.cluster_ids, dtype=np.int64),
+            ])
+            self._write_snapshot(merged, ids)
+
+    def _write_snapshot(self, index, ids: np.ndarray) -> None:
+        self.dir.mkdir(parents=True, exist_ok=True)
+
+        def save_ids(path: Path):
+            # np.save(path) would append ".npy" to the temporary name
+            with open(path, "wb") as f:
+                np.save(f, ids)
+
+        # A crash between these writes leaves snapshot and id map with
+        # different sizes; load() rejects that and the index is rebuilt
+        _atomic_write(self.snapshot_path, lambda p: faiss.write_index(index, str(p)))
+        _atomic_write(self.ids_path, save_ids)
+        _atomic_write(self.log_path, lambda p: p.write_bytes(b""))
+
+        self.base, self.base_ids = index, ids
+        self.index = faiss.IndexFlatIP(EMBED_DIM)
+        self.cluster_ids = []
+
+    def known_cluster_ids(self) -> set[int]:
+        with self._lock:
+            return set(np.asarray(self.base_ids).tolist()) | set(self.cluster_ids)
+
+    def add_missing(self, rows: Iterable[tuple[int, bytes]]) -> int:
+        """
+        Add stored (cluster_id, embedding bytes) rows the index lacks, e.g.
+        clusters committed to the DB just before a crash that preceded
+        their log append. Usable before `ready` is set.
+        """
+        ids, vectors = [], []
+        for cluster_id, embedding in rows:
+            ids.append(cluster_id)
+            vectors.append(np.frombuffer(embedding, dtype=np.float32))
+        if ids:
+            self._append(np.stack(vectors), ids)
+        return len(ids)
+
+    def add_clusters(self, embeddings, cluster_ids: list[int]):
+        if not cluster_ids:
+            return
+        self.ready.wait()
+        self._append(embeddings, cluster_ids)
+
+    def _append(self, embeddings, cluster_ids: list[int]):
+        emb = normalize_embedding(embeddings)
+        records = np.empty(len(cluster_ids), dtype=LOG_RECORD)
+        records["cluster_id"] = cluster_ids
+        records["embedding"] = emb
+
+        with self._lock:
+            self.dir.mkdir(parents=True, exist_ok=True)
+            with open(self.log_path, "ab") as f:
+                f.write(records.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            self.index.add(emb)
+            self.cluster_ids.extend(cluster_ids)
+            if len(self.cluster_ids) >= CLUSTER_INDEX_SNAPSHOT_EVERY:
+                self.snapshot()
+
+    def add_cluster(self, embedding, cluster_id: int):
+        self.add_clusters(embedding, [cluster_id])
+
+    def match_batch(self, embeddings) -> list[tuple[int | None, float]]:
+        emb = normalize_embedding(embeddings)
+        self.ready.wait()
+        with self._lock:
+            best = super().match_batch(emb)
+            if self.base is None or self.base.ntotal == 0:
+                return best
+            scores, ids = self.base.search(emb, 1)
+        return [
+            (int(self.base_ids[i]), float(score))
+            if i >= 0 and (cluster_id is None or score > best_score)
+            else (cluster_id, best_score)
+            for (cluster_id, best_score), i, score in zip(best, ids[:, 0], scores[:, 0])
+        ]
+
+    def match(self, embedding):
+        return self.match_batch(embedding)[0]
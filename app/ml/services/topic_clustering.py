@@ -1,6 +1,7 @@
 import faiss
 import numpy as np
-from db.models import TruthCluster
+from sqlalchemy import update
+from db.models import Article, ClusterEmbedding, TruthCluster
 
 SIM_THRESHOLD = 0.7
 EMBED_DIM = 384
@@ -31,6 +32,23 @@ class TopicClusterIndex:
         self.index.add(emb)
         self.cluster_ids.append(cluster_id)
 
+    def add_clusters(self, embeddings, cluster_ids: list[int]):
+        if not cluster_ids:
+            return
+        self.index.add(normalize_embedding(embeddings))
+        self.cluster_ids.extend(cluster_ids)
+
+    def match_batch(self, embeddings) -> list[tuple[int | None, float]]:
+        """Best cluster for every row of `embeddings` with one index search."""
+        emb = normalize_embedding(embeddings)
+        if self.index.ntotal == 0:
+            return [(None, 0.0)] * len(emb)
+        scores, ids = self.index.search(emb, 1)
+        return [
+            (self.cluster_ids[i], float(score)) if i >= 0 else (None, 0.0)
+            for i, score in zip(ids[:, 0], scores[:, 0])
+        ]
+
     def match(self, embedding):
         if self.index.ntotal == 0:
             return None, 0.0
@@ -51,9 +69,72 @@ def assign_topic_cluster(article, embedding, index: TopicClusterIndex, db):
     db.add(cluster)
     db.flush()  # ensures cluster.id exists
 
-    index.add_cluster(embedding, cluster.id)
-
+    emb = normalize_embedding(embedding)
+    db.add(ClusterEmbedding(cluster_id=cluster.id, embedding=emb[0].tobytes()))
     article.topic_cluster_id = cluster.id
     db.commit()
 
-    return cluster.id
\ No newline at end of file
+    # Only committed clusters go into the (persistent) index
+    index.add_cluster(emb, cluster.id)
+
+    return cluster.id
+
+
+def assign_topic_clusters(articles: list, embeddings, index: TopicClusterIndex, db) -> dict[int, int]:
+    """
+    Batched assign_topic_cluster: one index search for all articles,
+    articles in the same batch that match each other share a new cluster,
+    new clusters (and their embeddings) are flushed together and every
+    topic_cluster_id is written with one bulk UPDATE.
+    Returns {article_id: cluster_id}.
+    """
+    if not articles:
+        return {}
+
+    embeddings = normalize_embedding(embeddings)
+    matches = index.match_batch(embeddings)
+
+    new_clusters: list[TruthCluster] = []
+    new_rows: list[int] = []  # embedding row that represents each new cluster
+    assigned: list = []  # existing cluster id, or a TruthCluster created here
+
+    for row, (article, (cluster_id, score)) in enumerate(zip(articles, matches)):
+        best, best_score = cluster_id, score if cluster_id else 0.0
+
+        # Clusters created earlier in this batch are not in the index yet
+        if new_rows:
+            sims = embeddings[new_rows] @ embeddings[row]
+            k = int(np.argmax(sims))
+            if sims[k] > best_score:
+                best, best_score = new_clusters[k], float(sims[k])
+
+        if best is not None and best_score >= SIM_THRESHOLD:
+            assigned.append(best)
+            continue
+
+        cluster = TruthCluster(topic_summary=article.title)
+        new_clusters.append(cluster)
+        new_rows.append(row)
+        assigned.append(cluster)
+
+    db.add_all(new_clusters)
+    db.flush()  # ensures cluster ids exist
+    # Stored so the FAISS index can be rebuilt without re-embedding
+    db.add_all([
+        ClusterEmbedding(cluster_id=cluster.id, embedding=embeddings[row].tobytes())
+        for cluster, row in zip(new_clusters, new_rows)
+    ])
+
+    assignments = {
+        article.id: (target.id if isinstance(target, TruthCluster) else target)
+        for article, target in zip(articles, assigned)
+    }
+    db.execute(
+        update(Article),
+        [{"id": article_id, "topic_cluster_id": cluster_id} for article_id, cluster_id in assignments.items()],
+    )
+    db.commit()
+
+    # Only committed clusters go into the (persistent) index
+    index.add_clusters(embeddings[new_rows], [c.id for c in new_clusters])
+    return assignments
@@ -0,0 +1,45 @@
+import logging
+from functools import lru_cache
+
+import tiktoken
+
+logger = logging.getLogger(__name__)
+
+# tiktoken has no DeepSeek / Claude tokenizers; o200k_base is the
+# closest public BPE and errs on the high side for those models.
+DEFAULT_ENCODING = "o200k_base"
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str | None = None) -> tiktoken.Encoding | None:
+    try:
+        if model:
+            try:
+                return tiktoken.encoding_for_model(model)
+            except KeyError:
+                pass
+        return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception:
+        # BPE files are downloaded on first use; offline hosts fall back
+        logger.warning("tiktoken encoding unavailable, estimating tokens", exc_info=True)
+        return None
+
+
+def count_tokens(text: str, model: str | None = None) -> int:
+    """Exact token count for OpenAI models, a close estimate for others."""
+    encoding = get_encoding(model)
+    if encoding is None:
+        return max(1, len(text) // 3)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str | None = None) -> str:
+    """Longest prefix of `text` that fits in `max_tokens`."""
+    encoding = get_encoding(model)
+    if encoding is None:
+        return text[: max_tokens * 3]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    # Decoding a cut BPE sequence can end in a partial character
+    return encoding.decode(tokens[:max_tokens]).rstrip("\ufffd")
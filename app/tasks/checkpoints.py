@@ -0,0 +1,35 @@
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from db.models import ArticleCheckpoint
+from db.session import SessionLocal
+
+
+def load_checkpoints(article_id: int) -> dict[str, Any]:
+    """Finished stages of an article mapped to their stored results."""
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            select(ArticleCheckpoint.stage, ArticleCheckpoint.result)
+            .where(ArticleCheckpoint.article_id == article_id)
+        ).all()
+        return {stage: result for stage, result in rows}
+    finally:
+        db.close()
+
+
+def save_checkpoint(article_id: int, stage: str, result: Any = None) -> None:
+    stmt = insert(ArticleCheckpoint).values(article_id=article_id, stage=stage, result=result)
+    db = SessionLocal()
+    try:
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["article_id", "stage"],
+                set_={"result": stmt.excluded.result},
+            )
+        )
+        db.commit()
+    finally:
+        db.close()
@@ -0,0 +1,203 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import aliased
+
+from core.config import JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS, JOB_RETRY_BASE_SECONDS
+from db.models import Article, ContentSignature, PipelineJob
+from db.session import SessionLocal
+
+# analyzed and twitter_done are independent; published waits for both
+PUBLISH_PREREQUISITES = ("analyzed", "twitter_done")
+
+
+def enqueue_articles(article_ids: list[int]) -> None:
+    """Record freshly saved articles as scraped and queue their first stages."""
+    if not article_ids:
+        return
+    rows = []
+    for article_id in article_ids:
+        rows.append({"article_id": article_id, "stage": "scraped", "status": "done"})
+        for stage in PUBLISH_PREREQUISITES:
+            rows.append({"article_id": article_id, "stage": stage, "status": "pending"})
+
+    db = SessionLocal()
+    try:
+        db.execute(
+            insert(PipelineJob)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=["article_id", "stage"])
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def _waiting_on_canonical():
+    """
+    True for a job whose article is a near-duplicate of an article whose
+    analyzed job is still pending or running. Its own analyzed job waits
+    for that one, then links to the result instead of re-running the LLM.
+    """
+    copy = aliased(Article)
+    canonical = aliased(Article)
+    canonical_job = aliased(PipelineJob)
+    return (
+        select(canonical_job.id)
+        .select_from(copy)
+        .join(
+            ContentSignature,
+            and_(ContentSignature.namespace == "articles", ContentSignature.url == copy.url),
+        )
+        .join(
+            canonical,
+            and_(canonical.url == ContentSignature.canonical_url, canonical.id != copy.id),
+        )
+        .join(
+            canonical_job,
+            and_(
+                canonical_job.article_id == canonical.id,
+                canonical_job.stage == "analyzed",
+                canonical_job.status.in_(("pending", "running")),
+            ),
+        )
+        .where(copy.id == PipelineJob.article_id)
+        .exists()
+    )
+
+
+def claim_jobs(worker_id: str, limit: int) -> list[dict]:
+    """
+    Lease up to `limit` runnable jobs: pending ones whose retry delay has
+    passed, and running ones whose lease expired (their worker died).
+    Concurrent workers skip each other's locked rows. A near-duplicate's
+    analyzed job is held back until its canonical article is analyzed.
+    """
+    now = datetime.now(timezone.utc)
+    db = SessionLocal()
+    try:
+        jobs = db.execute(
+            select(PipelineJob)
+            .where(
+                or_(
+                    and_(PipelineJob.status == "pending", PipelineJob.available_at <= now),
+                    and_(PipelineJob.status == "running", PipelineJob.lease_expires_at < now),
+                ),
+                or_(PipelineJob.stage != "analyzed", ~_waiting_on_canonical()),
+            )
+            .order_by(PipelineJob.available_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        ).scalars().all()
+
+        claimed = []
+        for job in jobs:
+            job.status = "running"
+            job.attempts += 1
+            job.locked_by = worker_id
+            job.lease_expires_at = now + timedelta(seconds=JOB_LEASE_SECONDS)
+            claimed.append({
+                "id": job.id,
+                "article_id": job.article_id,
+                "stage": job.stage,
+                "attempts": job.attempts,
+                "worker_id": worker_id,
+            })
+        db.commit()
+        return claimed
+    finally:
+        db.close()
+
+
+def _leased(job: dict):
+    """
+    Fence for updates by the job's worker: the row must still be running
+    under this worker and this attempt. If the lease expired and another
+    worker reclaimed the job, the stale worker's writes match nothing.
+    """
+    return and_(
+        PipelineJob.id == job["id"],
+        PipelineJob.status == "running",
+        PipelineJob.locked_by == job["worker_id"],
+        PipelineJob.attempts == job["attempts"],
+    )
+
+
+def renew_lease(job: dict) -> bool:
+    """Extend a running job's lease. False if the lease was lost."""
+    db = SessionLocal()
+    try:
+        renewed = db.execute(
+            update(PipelineJob)
+            .where(_leased(job))
+            .values(lease_expires_at=datetime.now(timezone.utc) + timedelta(seconds=JOB_LEASE_SECONDS))
+        ).rowcount
+        db.commit()
+        return renewed == 1
+    finally:
+        db.close()
+
+
+def complete_job(job: dict) -> bool:
+    """Mark the job done. False if its lease was lost to another worker."""
+    db = SessionLocal()
+    try:
+        completed = db.execute(
+            update(PipelineJob)
+            .where(_leased(job))
+            .values(status="done", lease_expires_at=None, last_error=None)
+        ).rowcount
+        db.commit()
+        if not completed:
+            return False
+
+        # Checked after our own commit, so whichever prerequisite finishes
+        # last always sees both done and queues the publish step
+        if job["stage"] in PUBLISH_PREREQUISITES:
+            done = db.execute(
+                select(func.count())
+                .select_from(PipelineJob)
+                .where(
+                    PipelineJob.article_id == job["article_id"],
+                    PipelineJob.stage.in_(PUBLISH_PREREQUISITES),
+                    PipelineJob.status == "done",
+                )
+            ).scalar_one()
+            if done == len(PUBLISH_PREREQUISITES):
+                db.execute(
+                    insert(PipelineJob)
+                    .values(article_id=job["article_id"], stage="published", status="pending")
+                    .on_conflict_do_nothing(index_elements=["article_id", "stage"])
+                )
+                db.commit()
+        return True
+    finally:
+        db.close()
+
+
+def fail_job(job: dict, error: str) -> str | None:
+    """
+    Schedule a retry with exponential backoff, or give up after
+    JOB_MAX_ATTEMPTS. Returns the new status, or None if the lease was lost.
+    """
+    if job["attempts"] >= JOB_MAX_ATTEMPTS:
+        values = {"status": "failed"}
+    else:
+        delay = JOB_RETRY_BASE_SECONDS * 2 ** (job["attempts"] - 1)
+        values = {
+            "status": "pending",
+            "available_at": datetime.now(timezone.utc) + timedelta(seconds=delay),
+        }
+
+    db = SessionLocal()
+    try:
+        failed = db.execute(
+            update(PipelineJob)
+            .where(_leased(job))
+            .values(lease_expires_at=None, last_error=error[:2000], **values)
+        ).rowcount
+        db.commit()
+    finally:
+        db.close()
+    return values["status"] if failed else None
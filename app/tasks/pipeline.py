@@ -1,16 +1,32 @@
 import asyncio
-from ingestion.scraper import scrape_all_sources, scrape_videos
-from ml.embeddings import embed
-from ml.claim_extraction import extract_claims, analyze_article_no_claim, extract_info
-from ml.claim_comparison import compare_claims, semantic_group_claims, classify_group, save_supports, update_article_credibility, llm_contradiction_check
+from ingestion.scraper import commit_all_sources, iter_all_sources, scrape_all_sources, scrape_videos
+from ml.embeddings import embed, embed_batch, load_embedding_model
+from ml.claim_extraction import extract_claims, analyze_article_no_claim, analyze_article_no_claim_async, extract_info, validate_no_claim_analysis
+from ml.claim_comparison import compare_claims, semantic_group_claims, classify_group, save_supports, update_article_credibility, llm_contradiction_check, llm_contradiction_check_async
 from ml.truth_engine import evaluate_truth
-from ml.llm import call_llm
+from ml.llm import acall_llm
+from ml.llm_cache import get_llm_cache
 from core.logging import log
+from core.event_loop import run_on_loop
+from core.streams import abatch
+from core.config import (
+    LLM_CACHE_ENABLED,
+    PIPELINE_ARTICLE_CONCURRENCY,
+    PIPELINE_MODE,
+    PIPELINE_QUEUE_SIZE,
+    X_SEARCH_TIMEOUT_SECONDS,
+    PIPELINE_PERSIST_BATCH_SIZE,
+    PIPELINE_PERSIST_MAX_WAIT_SECONDS,
+)
 from ml.services.cluster_registry import get_cluster_index
-from ml.services.topic_clustering import SIM_THRESHOLD, assign_topic_cluster
+from ml.services.topic_clustering import SIM_THRESHOLD, assign_topic_cluster, assign_topic_clusters
 from db.models import TruthCluster, Article, Claim, ClaimSupport
 from db.session import SessionLocal
-from ingestion.persist import save_articles
+from ingestion.persist import is_storable, save_articles
+from tasks.jobs import enqueue_articles
+from tasks.checkpoints import load_checkpoints, save_checkpoint
+from ingestion.dedup import get_canonical_url, get_near_duplicate_index
+from sqlalchemy import select
 from tenacity import retry, stop_after_attempt, wait_exponential
 from db.helpers import get_all_cluster_ids
 from ingestion.sources import SOURCE_CREDIBILITY_MAP
@@ -30,7 +46,6 @@ from db.firebase import db as firebase_db
 from tasks.twitter import get_related_tweets, search_user_tweets, parse_tweets
 import httpx
 from fastapi import HTTPException
-import requests
 import re
 STOPWORDS = {
     "a","an","the","and","or","but","if","while","with","to","from","of",
@@ -39,7 +54,7 @@ STOPWORDS = {
 X_SEARCH_URL = "https://api.twitter.com/2/tweets/search/recent"
 BEARER_TOKEN = os.getenv("X_API_KEY")
 
-def detect_stance(title: str, content: str, tweet_text: str):
+async def detect_stance(title: str, content: str, tweet_text: str):
     system_prompt = """
     You are a stance detection engine.
 
@@ -66,7 +81,7 @@ def detect_stance(title: str, content: str, tweet_text: str):
     """
 
     try:
-        result = call_llm(system_prompt, user_text)
+        result = await acall_llm(system_prompt, user_text)
 
         stance = result.get("stance", "NEUTRAL")
         confidence = float(result.get("confidence", 0.0))
@@ -116,157 +131,215 @@ def chunk_list(lst, size):
     for i in range(0, len(lst), size):
         yield lst[i:i + size]
         
-async def process_twitter(article_id, title):
-    db = SessionLocal()
-    try:
-        article = db.get(Article, article_id)
+async def search_related_tweets(title: str) -> list[dict]:
+    """Recent X posts matching the article title's keywords."""
+    headers = {
+        "Authorization": f"Bearer {os.getenv('X_API_KEY')}"
+    }
+    keyword_query = build_query(title)
+    query = f"({keyword_query}) -is:retweet lang:en"
+
+    params = {
+        "query": query,
+        "max_results": 10,
+        "tweet.fields": "created_at,public_metrics",
+        "expansions": "author_id",
+        "user.fields": "username,name,profile_image_url"
+    }
 
-        if not article:
-            raise ValueError(f"Article {article_id} not found")
-        
-        BEARER_TOKEN = os.getenv("X_API_KEY") # Paste your bearer token here
-    
-        ARTICLE_URL = article.url
-        ARTICLE_TITLE = title
-        ARTICLE_CONTENT = article.content  # NEW: Pull full content from DB for semantic similarity
-        
-        # Optional: Add claims if you extract them programmatically from content
-        CLAIMS = None  # e.g., extract_key_claims(ARTICLE_CONTENT) if you have such a func
-        
-        # usernames = [           
-        #     "VitalikButerin",
-        #     "saylor",
-        #     "justinsuntron",
-        #     "APompliano",
-        #     "MMCrypto",
-        #     "Ashcryptoreal",
-        #     "balajis",
-        #     "elonmusk",
-        #     "cz_binance",
-        #     "nayibbukele",
-        #     "aantonop",
-        #     "CamiRusso",
-        #     "CathieDWood",
-        #     "ArthurHayes",
-        #     "RaoulGMI",
-        #     "Missteencrypto",
-        #     "Girlgone_Crypto",
-        #     "pierre_rochard",
-        #     "NickSzabo4",
-        #     "TySmithHQ",
-                       
-        # ]
-        
-        tweets = []
-        headers = {
-            "Authorization": f"Bearer {BEARER_TOKEN}"
-        }
-        # username_batches = list(chunk_list(usernames, 6))
-        
-        # for batch in username_batches:
+    async with httpx.AsyncClient(timeout=X_SEARCH_TIMEOUT_SECONDS) as client:
+        response = await client.get(X_SEARCH_URL, headers=headers, params=params)
 
-        #     user_query = " OR ".join([f"from:{u}" for u in batch])
+    if response.status_code != 200:
+        raise Exception(response.text)
 
-        keyword_query = build_query(ARTICLE_TITLE)
+    data = response.json()
 
-        # query = f"({keyword_query}) ({user_query}) -is:retweet lang:en"
-        query = f"({keyword_query}) -is:retweet lang:en"
+    users_map = {}
+    for u in data.get("includes", {}).get("users", []):
+        users_map[u["id"]] = {
+            "username": u.get("username"),
+            "name": u.get("name"),
+            "avatar" : u.get("profile_image_url"),
+            "profile_url" : f"https://twitter.com/{u.get('username')}"
+        }
 
-        params = {
-                "query": query,
-                "max_results": 10,
-                "tweet.fields": "created_at,public_metrics",
-                "expansions": "author_id",
-                "user.fields": "username,name,profile_image_url"
-            }
+    tweets = []
+    for tweet in data.get("data", []):
+        author = users_map.get(tweet.get("author_id"), {})
+        tweets.append({
+            "id": tweet.get("id"),
+            "text": tweet.get("text"),
+            "created_at": tweet.get("created_at"),
+            "metrics": tweet.get("public_metrics"),
+            "username": author.get("username", "unknown"),
+            "name": author.get("name", "unknown"),
+            "avatar": author.get("avatar"),
+            "profile_url": author.get("profile_url"),
+            "tweet_url": f"https://x.com/{author.get('username')}/status/{tweet.get('id')}"  # ✅ tweet link
+        })
+    return tweets
+
+
+def save_twitter_posts(article_id: int, tweets: list[dict], stances: list[str]):
+    """Upsert tweet authors and store the supporting / contradicting posts."""
+    users_ref = firebase_db.collection("twitter_users")
+    posts_ref = firebase_db.collection("twitter_posts")
+
+    for t, supporting in zip(tweets, stances):
+        post_url = f"https://x.com/{t['username']}/status/{t['id']}"
+        query = users_ref.where("xuser_name", "==", t['username']).limit(1).stream()
+        user_doc = None
+        for doc in query:
+            user_doc = doc
+            break
+        if user_doc is None:
+            users_ref.add({
+                "username": t['username'],
+                "name": t['name'],
+                "avatar" : t['avatar'],
+                "profile_url" : t['profile_url'],
+            })
+
+        print("supporting=====>", supporting)
+        if supporting in ("supporting", "contradicting"):
+            # Deterministic ID: a retried article overwrites, never duplicates
+            posts_ref.document(f"{article_id}_{t['id']}").set({
+                "name": t['name'],
+                "username": t['username'],
+                "content": t['text'],
+                "post_url": post_url,
+                "avatar" : t['avatar'],
+                "profile_url" : t['profile_url'],
+                "article_id": article_id,
+                "supporting_type": supporting
+            }, merge=True)
 
 
-        response = requests.get(X_SEARCH_URL, headers=headers, params=params)
-
-        if response.status_code != 200:
-                raise Exception(response.text)
-
-        data = response.json()
-
-        users_map = {}
-        for u in data.get("includes", {}).get("users", []):
-                users_map[u["id"]] = {
-                    "username": u.get("username"),
-                    "name": u.get("name"),
-                    "avatar" : u.get("profile_image_url"),
-                    "profile_url" : f"https://twitter.com/{u.get('username')}"
-                }
-                
-        for tweet in data.get("data", []):
-                author = users_map.get(tweet.get("author_id"), {})
-                tweet_data = {
-                    "id": tweet.get("id"),
-                    "text": tweet.get("text"),
-                    "created_at": tweet.get("created_at"),
-                    "metrics": tweet.get("public_metrics"),
-                    "username": author.get("username", "unknown"),
-                    "name": author.get("name", "unknown"),
-                    "avatar": author.get("avatar"),
-                    "profile_url": author.get("profile_url"),
-                    "tweet_url": f"https://x.com/{author.get('username')}/status/{tweet.get('id')}"  # ✅ tweet link
-                }
-                tweets.append(tweet_data)
-            # if "data" in data:
-            #     tweets.extend(data["data"])
-        
-        print(f"article id {article_id}")
-        # return tweets
-        users_ref = firebase_db.collection("twitter_users")
-        
-               
-        for i, t in enumerate(tweets):
-            # print(f"{i:2d}. @{t['username']}")
-            print(f"{t['avatar']}")
-            print(f"{t['profile_url']}")
-            print(f"{t['username']}")
-            print(f"   {t['text']}")
-            print(f"tweet_url")
-            post_url = f"https://x.com/{t['username']}/status/{t['id']}"
-            print(f"   {t['created_at']}")
-            print("-" * 80)
-            query = users_ref.where("xuser_name", "==", t['username']).limit(1).stream()
-            user_doc = None
-            for doc in query:
-                user_doc = doc
-                break
-            if user_doc is None:
-                new_user_ref = users_ref.add({
-                    "username": t['username'],
-                    "name": t['name'],
-                    "avatar" : t['avatar'],
-                    "profile_url" : t['profile_url'],
-                })
-                user_id = new_user_ref[1].id
-                print("if new user ref===>", new_user_ref)
-            else:
-                user_id = user_doc.id
-                print("else user doc", user_doc)
-                
-            
-            posts_ref = firebase_db.collection("twitter_posts")
-            supporting = llm_contradiction_check(ARTICLE_TITLE, t['text'])
-            print("supporting=====>", supporting)
-            if supporting in ("supporting", "contradicting"):
-                post_ref = posts_ref.add({
-                    "name": t['name'],
-                    "username": t['username'],
-                    "content": t['text'],
-                    "post_url": post_url,
-                    "avatar" : t['avatar'],
-                    "profile_url" : t['profile_url'],
-                    "article_id": article_id,
-                    "supporting_type": supporting
-                })          
-            
-            
-    except Exception as e:
+async def process_twitter(article_id, title):
+    """
+    Find X posts about the article, check every post's stance against the
+    title concurrently, then write the results to Firestore. The search
+    result and the finished step are checkpointed, so a retry resumes
+    instead of searching X and re-checking stances again.
+    """
+    checkpoints = await asyncio.to_thread(load_checkpoints, article_id)
+    if "twitter_done" in checkpoints:
+        return
+
+    tweets = checkpoints.get("twitter_search")
+    if tweets is None:
+        tweets = await search_related_tweets(title)
+        await asyncio.to_thread(save_checkpoint, article_id, "twitter_search", tweets)
+    print(f"article id {article_id}")
+
+    stances = await asyncio.gather(
+        *(llm_contradiction_check_async(title, t['text']) for t in tweets),
+        return_exceptions=True,
+    )
+    # A failed stance check only drops that tweet
+    stances = [
+        "unrelated" if isinstance(stance, Exception) else stance
+        for stance in stances
+    ]
+
+    await asyncio.to_thread(save_twitter_posts, article_id, tweets, stances)
+    await asyncio.to_thread(
+        save_checkpoint,
+        article_id,
+        "twitter_done",
+        {t['id']: stance for t, stance in zip(tweets, stances)},
+    )
+
+
+async def analyze_with_checkpoint(article_id: int, title: str, content: str) -> dict:
+    """
+    analyze_article_no_claim, reusing a stored result from an earlier
+    attempt. Only an analysis with every field apply_analysis reads is
+    checkpointed; a stored one without them is ignored and redone.
+    """
+    checkpoints = await asyncio.to_thread(load_checkpoints, article_id)
+    analysis = checkpoints.get("analysis")
+    if analysis is not None:
+        try:
+            validate_no_claim_analysis(analysis)
+            return analysis
+        except ValueError:
+            log.warning("invalid_analysis_checkpoint_ignored", article_id=article_id)
+    analysis = await analyze_article_no_claim_async(title, content)
+    validate_no_claim_analysis(analysis)
+    await asyncio.to_thread(save_checkpoint, article_id, "analysis", analysis)
+    return analysis
+
+def link_to_canonical(db, article: Article) -> bool:
+    """
+    If `article` is a near-duplicate of a story that was already analyzed,
+    copy that analysis instead of running the LLM again.
+    """
+    canonical_url = get_canonical_url("articles", article.url)
+    if not canonical_url:
+        return False
+
+    canonical = db.execute(
+        select(Article).where(Article.url == canonical_url)
+    ).scalar_one_or_none()
+    if canonical is None or canonical.jp_title is None:
+        # canonical copy not analyzed (yet): analyze this one normally
+        return False
+
+    article.priority = canonical.priority
+    article.category = canonical.category
+    article.jp_title = canonical.jp_title
+    article.jp_content = canonical.jp_content
+    article.summary = canonical.summary
+    article.title = canonical.title
+    article.topic_cluster_id = canonical.topic_cluster_id
+    article.publish_date = datetime.now(ZoneInfo("Asia/Tokyo"))
+    db.commit()
+    log.info("article_linked_to_canonical", article_id=article.id, canonical_id=canonical.id)
+    return True
+
+def apply_analysis(article: Article, analysis: dict):
+    article.priority = analysis["priority"]
+    article.category = analysis["category"]
+    article.jp_title = analysis["ja"]["title"]
+    article.jp_content = analysis["ja"]["content"]
+    article.summary = analysis["summary"]
+    article.title = analysis["new_title"]
+
+def load_unlinked_article(article_id: int) -> tuple[str, str] | None:
+    """
+    (title, content) of an article that still needs analysis, or None
+    once it has been linked to its canonical copy's analysis. Blocking;
+    async callers run it in a thread.
+    """
+    db = SessionLocal()
+    try:
+        article = db.get(Article, article_id)
+        if not article:
+            raise ValueError(f"Article {article_id} not found")
+        if link_to_canonical(db, article):
+            return None
+        return article.title, article.content
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def store_analysis(article_id: int, analysis: dict, publish: bool = True):
+    """Write an analysis onto the article (and publish it). Blocking."""
+    db = SessionLocal()
+    try:
+        article = db.get(Article, article_id)
+        if not article:
+            raise ValueError(f"Article {article_id} not found")
+        apply_analysis(article, analysis)
+        if publish:
+            article.publish_date = datetime.now(ZoneInfo("Asia/Tokyo"))
+        db.commit()
+    except Exception:
         db.rollback()
-        print("PROCESSING ARTICLE ERROR:", repr(e))
         raise
     finally:
         db.close()
@@ -277,50 +350,28 @@ async def process_twitter(article_id, title):
     reraise=True,
 )
 async def process_article(article_id: int):
-    db = SessionLocal()
+    # Database work runs in threads: other articles and the crawl share this loop
     try:
-        article = db.get(Article, article_id)
+        loaded = await asyncio.to_thread(load_unlinked_article, article_id)
+        if loaded is None:
+            return
+        title, content = loaded
+        # The X stance checks and the article analysis are independent
+        twitter_result, analysis = await asyncio.gather(
+            process_twitter(article_id, title),
+            analyze_with_checkpoint(article_id, title, content),
+            return_exceptions=True,
+        )
+        if isinstance(analysis, BaseException):
+            raise analysis
 
-        if not article:
-            raise ValueError(f"Article {article_id} not found")
-        title = article.title
-        await process_twitter(article_id, title)
-        analysis = analyze_article_no_claim(article.title, article.content)
-        
-        # ---- Assign article fields ----
-        article.priority = analysis["priority"]
-        article.category = analysis["category"]
-        article.jp_title = analysis["ja"]["title"]
-        article.jp_content = analysis["ja"]["content"]
-        article.summary = analysis["summary"]
-        article.title = analysis["new_title"]
-        article.publish_date = datetime.now(ZoneInfo("Asia/Tokyo"))
-        db.commit()
-        
-        
-        
-        # embedding = embed(article.content)
-        # index = get_cluster_index()
-
-        # cluster_id = assign_topic_cluster(article, embedding, index, db)
-
-        # # claims_data = extract_claims(article.content)
-        # claims_data = analysis.get("claims", [])
-        # for c in claims_data:
-        #     db.add(Claim(
-        #         article_id=article.id,
-        #         claim_text=c["claim_text"],
-        #         claim_type=c["claim_type"],
-        #         sentiment=c["sentiment"],
-        #     ))
-        
-        # return cluster_id
+        await asyncio.to_thread(store_analysis, article_id, analysis)
+
+        if isinstance(twitter_result, BaseException):
+            raise twitter_result
     except Exception as e:
-        db.rollback()
         print("PROCESSING ARTICLE ERROR:", repr(e))
         raise
-    finally:
-        db.close()
 
 @retry(
     stop=stop_after_attempt(3),
@@ -399,28 +450,131 @@ def evaluate_cluster(cluster_id: int):
     finally:
         db.close()
         
-async def run_pipeline_async():
- 
-    articles = await scrape_all_sources()
-    if not articles:
-        log.info("pipeline_no_articles")
-        return
+def article_urls(article_ids: list[int]) -> dict[int, str]:
+    db = SessionLocal()
+    try:
+        return dict(db.execute(
+            select(Article.id, Article.url).where(Article.id.in_(article_ids))
+        ).all())
+    finally:
+        db.close()
 
-    article_ids = save_articles(articles)
-    print("article ids===>", article_ids)
-    log.info("articles_saved", count=len(article_ids))
+def cluster_articles(article_ids: list[int]) -> dict[int, int]:
+    """
+    Topic-cluster every article saved in a cycle: one embed_batch call,
+    one batched index search and one bulk topic_cluster_id update.
+    """
+    if not article_ids:
+        return {}
+    load_embedding_model()
+    db = SessionLocal()
+    try:
+        articles = db.execute(
+            select(Article).where(Article.id.in_(article_ids)).order_by(Article.id)
+        ).scalars().all()
+        embeddings = embed_batch([a.content or a.title or "" for a in articles])
+        return assign_topic_clusters(articles, embeddings, get_cluster_index(), db)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
 
-    for article_id in article_ids:
+async def run_pipeline_async():
+    """
+    scrape → persist → analyze as concurrent stages joined by bounded
+    queues: an article is saved and analyzed as soon as it is scraped,
+    and a slow stage back-pressures the ones before it.
+    """
+    saved_ids: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    in_flight = asyncio.Semaphore(PIPELINE_ARTICLE_CONCURRENCY)
+    dedup = get_near_duplicate_index("articles")
+    scraped_count = 0
+    cycle_ids: list[int] = []
+    # url → resolved once that article's processing ends; a copy of a story
+    # saved this cycle waits on its canonical copy instead of racing it
+    processed: dict[str, asyncio.Future] = {}
+
+    async def persist_stage():
+        nonlocal scraped_count
+        try:
+            async for batch in abatch(
+                iter_all_sources(),
+                PIPELINE_PERSIST_BATCH_SIZE,
+                PIPELINE_PERSIST_MAX_WAIT_SECONDS,
+            ):
+                scraped_count += len(batch)
+                article_ids = await asyncio.to_thread(save_articles, batch)
+                # Flag wire copies of the same story so they reuse one LLM
+                # analysis. Signed after the insert, and only stored
+                # articles, so no copy links to a story that was dropped
+                await asyncio.to_thread(dedup.mark, [a for a in batch if is_storable(a)])
+                print("article ids===>", article_ids)
+                log.info("articles_saved", count=len(article_ids))
+                cycle_ids.extend(article_ids)
+                if PIPELINE_MODE == "queue":
+                    # Worker processes pick these up from pipeline_jobs
+                    await asyncio.to_thread(enqueue_articles, article_ids)
+                    continue
+                if not article_ids:
+                    continue
+                urls = await asyncio.to_thread(article_urls, article_ids)
+                canonical_urls = {a["url"]: a.get("canonical_url") for a in batch}
+                items = []
+                for article_id in article_ids:
+                    url = urls[article_id]
+                    processed[url] = asyncio.get_running_loop().create_future()
+                    items.append((article_id, url, canonical_urls.get(url)))
+                # Canonical copies go first: they never wait, so a copy
+                # holding an analysis slot always has its canonical running
+                items.sort(key=lambda item: item[2] is not None)
+                for item in items:
+                    await saved_ids.put(item)
+            # Every scraped article is stored: listings may now count as seen
+            await commit_all_sources()
+        finally:
+            await saved_ids.put(None)
+
+    async def analyze_article(article_id: int, url: str, canonical_url: str | None):
         try:
+            canonical_done = processed.get(canonical_url)
+            if canonical_done is not None:
+                # Let link_to_canonical find the canonical copy analyzed
+                await canonical_done
             log.info("processing_article_started", article_id=article_id)
             await process_article(article_id)
-            
         except Exception as e:
             log.error(
                 "article_processing_failed",
                 article_id=article_id,
                 error=str(e)
-            )           
+            )
+        finally:
+            processed[url].set_result(None)
+            in_flight.release()
+
+    async def analyze_stage():
+        tasks: set[asyncio.Task] = set()
+        while (item := await saved_ids.get()) is not None:
+            # Waiting for a free slot here back-pressures the persist stage
+            await in_flight.acquire()
+            task = asyncio.create_task(analyze_article(*item))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks)
+
+    await asyncio.gather(persist_stage(), analyze_stage())
+    if not scraped_count:
+        log.info("pipeline_no_articles")
+
+    if cycle_ids:
+        try:
+            clusters = await asyncio.to_thread(cluster_articles, cycle_ids)
+            log.info("articles_clustered", count=len(clusters), clusters=len(set(clusters.values())))
+        except Exception as e:
+            log.error("article_clustering_failed", error=str(e))
+    if LLM_CACHE_ENABLED:
+        log.info("llm_cache_stats", **get_llm_cache().stats())
     # touched_clusters: set[int] = set()
     
     # for article_id in article_ids:
@@ -458,15 +612,10 @@ async def run_pipeline_async():
 def run_pipeline():
     """
     Synchronous entry point for schedulers / workers.
-    Safely executes async pipeline.
+    Runs the async pipeline on a long-lived event loop so loop-bound
+    resources (e.g. the pooled browser) are reused between runs.
     """
-    try:
-        asyncio.run(run_pipeline_async())
-    except RuntimeError as e:
-        # Handles case where an event loop already exists (rare but possible)
-        log.warning("event_loop_exists_fallback", error=str(e))
-        loop = asyncio.get_event_loop()
-        loop.run_until_complete(run_pipeline_async())
+    run_on_loop("pipeline", run_pipeline_async())
     
 
 
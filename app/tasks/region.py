@@ -1,15 +1,18 @@
 import asyncio
 from core.logging import log
-from ingestion.scraper import scrape_region_sources
+from core.event_loop import run_on_loop
+from ingestion.scraper import commit_region_sources, scrape_region_sources
 from ingestion.persist import save_region_articles
 async def run_region_pipeline_async():
  
     articles = await scrape_region_sources()
     if not articles:
         log.info("pipeline_no_articles")
+        await commit_region_sources()
         return
 
-    article_ids = save_region_articles(articles)
+    article_ids = await save_region_articles(articles)
+    await commit_region_sources()
     print("regional_article ids===>", article_ids)
     log.info("regional_articles_saved", count=len(article_ids))
 
@@ -20,12 +23,7 @@ async def run_region_pipeline_async():
 def run_region_pipeline():
     """
     Synchronous entry point for schedulers / workers.
-    Safely executes async pipeline.
+    Runs the async pipeline on a long-lived event loop so loop-bound
+    resources (e.g. the pooled browser) are reused between runs.
     """
-    try:
-        asyncio.run(run_region_pipeline_async())
-    except RuntimeError as e:
-        # Handles case where an event loop already exists (rare but possible)
-        log.warning("event_loop_exists_fallback", error=str(e))
-        loop = asyncio.get_event_loop()
-        loop.run_until_complete(run_region_pipeline_async())
\ No newline at end of file
+    run_on_loop("region_pipeline", run_region_pipeline_async())
\ No newline at end of file
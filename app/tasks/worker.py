@@ -0,0 +1,171 @@
+"""
+Pipeline worker: drains pipeline_jobs rows written in PIPELINE_MODE=queue.
+
+Run any number of these, on any number of hosts:
+
+    python -m tasks.worker
+"""
+from dotenv import load_dotenv
+
+# Before any app import: core.config reads the environment at import time
+load_dotenv()
+
+import asyncio
+import os
+import socket
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from core.config import JOB_HEARTBEAT_SECONDS, WORKER_CONCURRENCY, WORKER_POLL_SECONDS
+from core.logging import init_logging, log
+from db.models import Article
+from db.session import SessionLocal
+from ingestion.dedup import get_canonical_url
+from tasks.jobs import claim_jobs, complete_job, fail_job, renew_lease
+from tasks.pipeline import (
+    analyze_with_checkpoint,
+    load_unlinked_article,
+    process_twitter,
+    store_analysis,
+)
+
+
+def _load_article(db, article_id: int) -> Article:
+    article = db.get(Article, article_id)
+    if not article:
+        raise ValueError(f"Article {article_id} not found")
+    return article
+
+
+# Database work runs in threads: WORKER_CONCURRENCY jobs share this loop
+
+async def run_analyzed(article_id: int):
+    loaded = await asyncio.to_thread(load_unlinked_article, article_id)
+    if loaded is None:
+        return
+    analysis = await analyze_with_checkpoint(article_id, *loaded)
+    # Publishing is its own stage, once the X posts are in too
+    await asyncio.to_thread(store_analysis, article_id, analysis, False)
+
+
+def _twitter_target(article_id: int) -> str | None:
+    """Title to search X for, or None for a wire copy of another story."""
+    db = SessionLocal()
+    try:
+        article = _load_article(db, article_id)
+        url, title = article.url, article.title
+    finally:
+        db.close()
+    # Wire copies of a story share the canonical article's X posts
+    if get_canonical_url("articles", url):
+        return None
+    return title
+
+
+async def run_twitter_done(article_id: int):
+    title = await asyncio.to_thread(_twitter_target, article_id)
+    if title is not None:
+        await process_twitter(article_id, title)
+
+
+def _publish(article_id: int):
+    db = SessionLocal()
+    try:
+        article = _load_article(db, article_id)
+        article.publish_date = datetime.now(ZoneInfo("Asia/Tokyo"))
+        db.commit()
+    finally:
+        db.close()
+
+
+async def run_published(article_id: int):
+    await asyncio.to_thread(_publish, article_id)
+
+
+STAGE_HANDLERS = {
+    "analyzed": run_analyzed,
+    "twitter_done": run_twitter_done,
+    "published": run_published,
+}
+
+
+async def heartbeat(job: dict, handler: asyncio.Task, lease_lost: asyncio.Event):
+    """Keep the job's lease alive while it runs; stop the handler if it was lost."""
+    while True:
+        await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+        if not await asyncio.to_thread(renew_lease, job):
+            log.warning("pipeline_job_lease_lost", job_id=job["id"], article_id=job["article_id"], stage=job["stage"])
+            lease_lost.set()
+            handler.cancel()
+            return
+
+
+async def run_job(job: dict):
+    handler = asyncio.create_task(STAGE_HANDLERS[job["stage"]](job["article_id"]))
+    lease_lost = asyncio.Event()
+    keepalive = asyncio.create_task(heartbeat(job, handler, lease_lost))
+    try:
+        await handler
+    except asyncio.CancelledError:
+        if not lease_lost.is_set():
+            raise  # the worker itself is shutting down
+        # Another worker owns the job now; leave the row to it
+        return
+    except Exception as e:
+        status = await asyncio.to_thread(fail_job, job, repr(e))
+        log.error(
+            "pipeline_job_failed",
+            job_id=job["id"],
+            article_id=job["article_id"],
+            stage=job["stage"],
+            attempts=job["attempts"],
+            status=status or "lease_lost",
+            error=str(e),
+        )
+        return
+    finally:
+        keepalive.cancel()
+    if not await asyncio.to_thread(complete_job, job):
+        log.warning("pipeline_job_lease_lost", job_id=job["id"], article_id=job["article_id"], stage=job["stage"])
+        return
+    log.info("pipeline_job_done", job_id=job["id"], article_id=job["article_id"], stage=job["stage"])
+
+
+async def run_worker_async(worker_id: str):
+    log.info("pipeline_worker_started", worker_id=worker_id)
+    in_flight = asyncio.Semaphore(WORKER_CONCURRENCY)
+    tasks: set[asyncio.Task] = set()
+
+    async def run_and_release(job: dict):
+        try:
+            await run_job(job)
+        finally:
+            in_flight.release()
+
+    while True:
+        # Only lease as many jobs as there are free slots
+        await in_flight.acquire()
+        free = 1
+        while free < WORKER_CONCURRENCY and not in_flight.locked():
+            await in_flight.acquire()
+            free += 1
+
+        jobs = await asyncio.to_thread(claim_jobs, worker_id, free)
+        for _ in range(free - len(jobs)):
+            in_flight.release()
+        for job in jobs:
+            task = asyncio.create_task(run_and_release(job))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        if not jobs:
+            await asyncio.sleep(WORKER_POLL_SECONDS)
+
+
+def run_worker():
+    init_logging()
+    asyncio.run(run_worker_async(f"{socket.gethostname()}:{os.getpid()}"))
+
+
+if __name__ == "__main__":
+    run_worker()